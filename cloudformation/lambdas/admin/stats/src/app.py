@@ -1,18 +1,6 @@
 import json
-import os
-import pymysql
 import traceback
-
-
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor,
-    )
+from db import get_connection, release_connection
 
 
 def response(status_code, body):
@@ -46,7 +34,7 @@ def lambda_handler(event, context):
 
     connection = None
     try:
-        connection = create_connection()
+        connection = get_connection()
         with connection.cursor() as cursor:
             cursor.execute(GET_STATS_SQL)
             row = cursor.fetchone()
@@ -62,4 +50,4 @@ def lambda_handler(event, context):
 
     finally:
         if connection:
-            connection.close()
+            release_connection(connection)
@@ -1,59 +1,71 @@
-import pymysql
+import logging
 import os
+import time
 import traceback
+from db import get_connection, release_connection
+from permissions import DENIED_RESOURCES, denied_resources
+from token_cache import MISSING, TokenCache
 
-PATH_PERMISSIONS = {
-    "POST /players": "admin",
-    "DELETE /players": "admin",
-    "PATCH /players": "admin",
-    "POST /teams": "admin",
-    "DELETE /teams": "admin",
-    "PATCH /teams": "admin",
-    "GET /riot-accounts": "admin",
-    "GET /riot-accounts/{id}": "admin",
-    "GET /riot-accounts/player/{player_id}": "admin",
-    "POST /riot-accounts": "admin",
-    "DELETE /riot-accounts": "admin",
-    "PATCH /riot-accounts": "admin",
-    "GET /config": "admin",
-    "PUT /config": "admin",
-    "DELETE /config": "admin",
-    "GET /profiles": "admin",
-    "GET /profiles/{id}": "admin",
-    "PUT /pickems": ["admin", "user"],
-    "PUT /dream-draft": ["admin", "user"],
-    "POST /tournament/create-lobby/{id}": "admin",
-    "POST /champ-select-lobby": "admin",
-    "GET /champ-select-lobby": "admin",
-    "GET /admin/stats": "admin",
-}
-
-
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor,
-    )
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+GET_PROFILE_SQL = "SELECT id, type FROM profiles WHERE token = %s"
+
+# Bumping this config value (e.g. through PUT /config after changing someone's
+# role or token) empties every warm container's cache within
+# GENERATION_CHECK_SECONDS instead of waiting out the TTL. This does not
+# revoke anything by itself: API Gateway keeps answering from the policy it
+# cached for the token until ReauthorizeEvery (300s, main.yaml) runs out, so
+# a change takes effect within about five minutes. The bump only makes sure
+# the next authorization after that reads the new role. The check is one
+# primary-key read of the config table per warm container every 15s.
+CACHE_GENERATION_CONFIG = "auth_cache_generation"
+GET_CACHE_GENERATION_SQL = "SELECT value FROM config WHERE name = %s"
+GENERATION_CHECK_SECONDS = int(
+    os.environ.get("AUTH_CACHE_GENERATION_CHECK_SECONDS", 15)
+)
+
+cache = TokenCache()
+cache_generation = None
+generation_checked_at = None
+
+
+def stage_arn(method_arn: str) -> str:
+    # arn:...:apiId/stage/GET/profiles/5 -> arn:...:apiId/stage
+    return "/".join(method_arn.split("/")[:2])
 
 
 def generatePolicy(
-    principalId, effect, error_message="You are not allowed to do this."
+    principalId,
+    effect,
+    error_message="You are not allowed to do this.",
+    denied_resources=(),
 ):
+    """
+    A policy for the whole stage rather than the one method being called:
+    `effect` on every route, then an explicit Deny on each of
+    `denied_resources`. API Gateway caches it per token and can answer any
+    route the caller hits next from that one policy.
+    """
     authResponse = {}
     authResponse["principalId"] = principalId
     if effect and METHOD_ARN:
+        stage = stage_arn(METHOD_ARN)
         policyDocument = {}
         policyDocument["Version"] = "2012-10-17"
-        policyDocument["Statement"] = []
         statementOne = {}
         statementOne["Action"] = "execute-api:Invoke"
         statementOne["Effect"] = effect
-        statementOne["Resource"] = METHOD_ARN
+        statementOne["Resource"] = f"{stage}/*"
         policyDocument["Statement"] = [statementOne]
+        if denied_resources:
+            policyDocument["Statement"].append(
+                {
+                    "Action": "execute-api:Invoke",
+                    "Effect": "Deny",
+                    "Resource": [f"{stage}/{denied}" for denied in denied_resources],
+                }
+            )
         authResponse["policyDocument"] = policyDocument
 
         if effect == "Deny":
@@ -62,46 +74,94 @@ def generatePolicy(
     return authResponse
 
 
+def refresh_cache_generation(connection) -> None:
+    """Drop every cached token if the invalidation generation has moved."""
+    global cache_generation, generation_checked_at
+
+    with connection.cursor() as cursor:
+        cursor.execute(GET_CACHE_GENERATION_SQL, (CACHE_GENERATION_CONFIG,))
+        row = cursor.fetchone()
+    generation = row["value"] if row else None
+
+    if generation_checked_at is not None and generation != cache_generation:
+        cache.invalidate()
+    cache_generation = generation
+    generation_checked_at = time.monotonic()
+
+
+def generation_check_due() -> bool:
+    return (
+        generation_checked_at is None
+        or time.monotonic() - generation_checked_at >= GENERATION_CHECK_SECONDS
+    )
+
+
+def policy_denials(role: str) -> list[str]:
+    if role in DENIED_RESOURCES:
+        return DENIED_RESOURCES[role]
+    return denied_resources(role)
+
+
+def lookup_identity(connection, token: str) -> tuple[str, str] | None:
+    with connection.cursor() as cursor:
+        cursor.execute(GET_PROFILE_SQL, (token,))
+        result = cursor.fetchone()
+    if result is None:
+        return None
+    return str(result["id"]), str(result.get("type") or "null").lower()
+
+
+def resolve_identity(token: str) -> tuple[str, str] | None:
+    """
+    The (principal, role) behind `token`, or None for an unknown token.
+    Repeat callers are answered from the container's cache; the database is
+    only touched on a miss or for the periodic invalidation check.
+    """
+    if not generation_check_due():
+        identity = cache.get(token)
+        if identity is not MISSING:
+            return identity
+
+    connection = get_connection()
+    try:
+        if generation_check_due():
+            refresh_cache_generation(connection)
+            identity = cache.get(token)
+            if identity is not MISSING:
+                return identity
+
+        identity = lookup_identity(connection, token)
+        cache.put(token, identity)
+        return identity
+    finally:
+        release_connection(connection)
+
+
 def lambda_handler(event, context):
     global METHOD_ARN
-    global TOKEN
     METHOD_ARN = event["methodArn"]
 
     if event["httpMethod"] == "OPTIONS":
         return generatePolicy("OPTIONS", "Allow")
 
-    TOKEN = event["headers"].get("Authorization") or event["headers"].get(
+    token = event["headers"].get("Authorization") or event["headers"].get(
         "authorization"
     )
-
-    connection = None
+    if not token:
+        return generatePolicy("null", "Deny", "Invalid token provided")
 
     try:
-        connection = create_connection()
-
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT * FROM profiles WHERE token = %s", (TOKEN))
-            result = cursor.fetchone()
+        identity = resolve_identity(token)
 
-        connection.close()
-
-        if result == None:
+        if identity is None:
             return generatePolicy("null", "Deny", "Invalid token provided")
 
-        user_type = str(result.get("type", "null")).lower()
-        http_method = event["httpMethod"]
-        path = event["resource"].rstrip("/")
-
-        required_type = PATH_PERMISSIONS.get(f"{http_method} {path}")
-
-        if required_type and user_type not in PATH_PERMISSIONS[f"{http_method} {path}"]:
-            return generatePolicy(
-                user_type,
-                "Deny",
-                f"User type {user_type} is not allowed to execute {http_method} {path}",
-            )
-
-        return generatePolicy(user_type, "Allow")
+        principal, user_type = identity
+        # the Deny list is the only authorization decision; API Gateway
+        # applies it to this route and to every later one the policy covers
+        return generatePolicy(
+            principal, "Allow", denied_resources=policy_denials(user_type)
+        )
 
     except Exception as e:
         traceback.print_exc()
@@ -0,0 +1,48 @@
+# Routes that need more than a valid token: (method, resource, allowed roles).
+# The method may be "*" for every method, and a resource ending in "/*"
+# covers everything below that prefix. Routes not listed here are open to
+# every signed-in user.
+PERMISSION_RULES = [
+    ("POST", "/players", {"admin"}),
+    ("DELETE", "/players", {"admin"}),
+    ("PATCH", "/players", {"admin"}),
+    ("POST", "/teams", {"admin"}),
+    ("DELETE", "/teams", {"admin"}),
+    ("PATCH", "/teams", {"admin"}),
+    ("*", "/riot-accounts/*", {"admin"}),
+    ("*", "/config/*", {"admin"}),
+    ("GET", "/profiles/*", {"admin"}),
+    ("PUT", "/pickems", {"admin", "user"}),
+    ("PUT", "/dream-draft", {"admin", "user"}),
+    ("POST", "/tournament/create-lobby/{id}", {"admin"}),
+    ("*", "/champ-select-lobby/*", {"admin"}),
+    ("*", "/admin/*", {"admin"}),
+]
+
+ROLES = ("admin", "player", "user")
+
+
+def arn_resource(method: str, resource: str) -> str:
+    # ("GET", "/profiles/{id}") -> "GET/profiles/*"; ("*", "/admin/*") -> "*/admin/*"
+    segments = ["*" if s.startswith("{") else s for s in resource.split("/")]
+    return method + "/".join(segments)
+
+
+def denied_resources(role: str) -> list[str]:
+    """
+    Every route the role may not call, as execute-api resource suffixes. A
+    policy that allows everything and denies these covers the whole API, so
+    API Gateway can reuse it for any route the caller hits.
+    """
+    denied = []
+    for method, resource, roles in PERMISSION_RULES:
+        if role in roles:
+            continue
+        denied.append(arn_resource(method, resource))
+        if resource.endswith("/*"):
+            # the prefix itself, e.g. /config as well as /config/{name}
+            denied.append(arn_resource(method, resource[:-2]))
+    return denied
+
+
+DENIED_RESOURCES = {role: denied_resources(role) for role in ROLES}
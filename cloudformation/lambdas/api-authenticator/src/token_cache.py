@@ -0,0 +1,54 @@
+import os
+import time
+from collections import OrderedDict
+
+# Warm authorizer containers answer repeat callers from memory. Entries expire
+# after a TTL (unknown tokens sooner, so a fresh sign-up isn't locked out for
+# long) and the least recently used are evicted past MAX_ENTRIES.
+TTL_SECONDS = int(os.environ.get("AUTH_CACHE_TTL_SECONDS", 300))
+NEGATIVE_TTL_SECONDS = int(os.environ.get("AUTH_CACHE_NEGATIVE_TTL_SECONDS", 30))
+MAX_ENTRIES = int(os.environ.get("AUTH_CACHE_MAX_ENTRIES", 2048))
+
+MISSING = object()
+
+
+class TokenCache:
+    def __init__(
+        self,
+        ttl: float = TTL_SECONDS,
+        negative_ttl: float = NEGATIVE_TTL_SECONDS,
+        max_entries: int = MAX_ENTRIES,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # token -> (expires_at, identity or None)
+
+    def get(self, token: str):
+        """
+        The cached (principal, role) for `token`, None if the token is cached
+        as unknown, or MISSING if it has to be looked up.
+        """
+        entry = self.entries.get(token)
+        if entry is None:
+            return MISSING
+        expires_at, identity = entry
+        if expires_at <= time.monotonic():
+            del self.entries[token]
+            return MISSING
+        self.entries.move_to_end(token)
+        return identity
+
+    def put(self, token: str, identity: tuple[str, str] | None) -> None:
+        ttl = self.ttl if identity is not None else self.negative_ttl
+        self.entries[token] = (time.monotonic() + ttl, identity)
+        self.entries.move_to_end(token)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, token: str | None = None) -> None:
+        """Forget one token, or every token if none is given."""
+        if token is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(token, None)
@@ -1,10 +1,16 @@
 import os
+import zlib
 import boto3
-import json
 from typing import Any, Dict
 
 ddb_client = boto3.client("dynamodb")
 
+# Spectators are kept out of the lobby item, in SPECTATORS#<lobby>#<n> items
+# holding a string set of connection IDs. Joining or leaving is one ADD or
+# DELETE on one small item, so a crowd of spectators never rewrites the lobby
+# or contends on a single key. Must match sendmessage.
+SPECTATOR_SHARDS = int(os.environ.get("SPECTATOR_SHARDS", 16))
+
 
 def lambda_handler(event, context):
     try:
@@ -22,19 +28,21 @@ def lambda_handler(event, context):
         if not lobby:
             return {"statusCode": 400, "body": "No Lobby found"}
 
-        blue_captain = lobby.get("blueCaptain", {}).get("S")
-        red_captain = lobby.get("redCaptain", {}).get("S")
-        spectators = json.loads(lobby.get("spectators", {}).get("S", "[]"))
+        captain = {"blue": "blueCaptain", "red": "redCaptain"}.get(team_type)
+        shard = None
 
-        if team_type == "blue" and not blue_captain:
-            lobby["blueCaptain"] = {"S": connection_id}
-        elif team_type == "red" and not red_captain:
-            lobby["redCaptain"] = {"S": connection_id}
-        else:
-            spectators.append(connection_id)
-            lobby["spectators"] = {"S": json.dumps(spectators)}
+        if not captain or not claim_captain(
+            os.environ["TABLE_NAME"], lobby, captain, connection_id
+        ):
+            captain = None
+            shard = add_spectator(
+                os.environ["TABLE_NAME"], lobby, lobby_id, connection_id
+            )
 
-        put_item(table_name=os.environ["TABLE_NAME"], item=lobby)
+        put_item(
+            table_name=os.environ["TABLE_NAME"],
+            item=connection_item(connection_id, lobby, captain, shard),
+        )
 
     except Exception as e:
         error_type = type(e).__name__
@@ -45,6 +53,68 @@ def lambda_handler(event, context):
     return {"statusCode": 200}
 
 
+def spectator_shard(lobby_id: str, connection_id: str) -> str:
+    shard = zlib.crc32(connection_id.encode()) % SPECTATOR_SHARDS
+    return f"SPECTATORS#{lobby_id}#{shard}"
+
+
+def claim_captain(
+    table_name: str, lobby: Dict[str, Any], captain: str, connection_id: str
+) -> bool:
+    # Conditional, so two connections asking for the same seat can't both get it
+    try:
+        ddb_client.update_item(
+            TableName=table_name,
+            Key={"lobbyId": lobby["lobbyId"]},
+            UpdateExpression="SET #captain = :id",
+            ConditionExpression="attribute_not_exists(#captain) OR #captain = :empty",
+            ExpressionAttributeNames={"#captain": captain},
+            ExpressionAttributeValues={
+                ":id": {"S": connection_id},
+                ":empty": {"S": ""},
+            },
+        )
+    except ddb_client.exceptions.ConditionalCheckFailedException:
+        return False
+    return True
+
+
+def add_spectator(
+    table_name: str, lobby: Dict[str, Any], lobby_id: str, connection_id: str
+) -> str:
+    shard_key = spectator_shard(lobby_id, connection_id)
+    update = {
+        "UpdateExpression": "ADD connections :ids",
+        "ExpressionAttributeValues": {":ids": {"SS": [connection_id]}},
+    }
+    if "TTL" in lobby:
+        update["UpdateExpression"] += " SET #ttl = if_not_exists(#ttl, :ttl)"
+        update["ExpressionAttributeNames"] = {"#ttl": "TTL"}
+        update["ExpressionAttributeValues"][":ttl"] = lobby["TTL"]
+
+    ddb_client.update_item(
+        TableName=table_name, Key={"lobbyId": {"S": shard_key}}, **update
+    )
+    return shard_key
+
+
+def connection_item(
+    connection_id: str, lobby: Dict[str, Any], captain: str | None, shard: str | None
+) -> Dict[str, Any]:
+    # Lets disconnect find what to release with one key lookup. Expires with
+    # the lobby.
+    item = {
+        "lobbyId": {"S": f"CONN#{connection_id}"},
+        "lobby": {"S": lobby["lobbyId"]["S"]},
+        "role": {"S": captain or "spectator"},
+    }
+    if shard:
+        item["shard"] = {"S": shard}
+    if "TTL" in lobby:
+        item["TTL"] = lobby["TTL"]
+    return item
+
+
 def put_item(table_name: str, item: Dict[str, Any]) -> None:
     ddb_client.put_item(TableName=table_name, Item=item)
 
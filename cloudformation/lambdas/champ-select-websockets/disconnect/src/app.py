@@ -1,7 +1,6 @@
 import json
 import os
 import boto3
-from boto3.dynamodb.conditions import Attr
 from typing import Any, Dict
 
 ddb_client = boto3.client("dynamodb")
@@ -10,67 +9,116 @@ ddb_client = boto3.client("dynamodb")
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, int]:
     try:
         connection_id = event["requestContext"]["connectionId"]
-        
-        lobby = get_lobby(
-            os.environ["TABLE_NAME"],
-            connection_id
-        )
 
-        if not lobby:
-            return { "statusCode": 400, "body": "No Lobby found" }
+        connection = get_connection(os.environ["TABLE_NAME"], connection_id)
+
+        if not connection:
+            return {"statusCode": 400, "body": "No Lobby found"}
 
-        blue_captain = lobby.get("blueCaptain", {}).get("S")
-        red_captain = lobby.get("redCaptain", {}).get("S")
-        spectators = json.loads(lobby.get("spectators", {}).get("S", "[]"))
+        role = connection.get("role", {}).get("S")
 
-        if blue_captain == connection_id:
-            lobby["blueCaptain"] = {"S":""}
-        elif red_captain == connection_id:
-            lobby["redCaptain"] = {"S": ""}
+        # Each case touches only the item holding this connection: the
+        # captain's seat on the lobby or the spectator's shard
+        if role in ("blueCaptain", "redCaptain"):
+            release_captain(
+                os.environ["TABLE_NAME"], connection["lobby"]["S"], role, connection_id
+            )
+        elif role == "spectator":
+            remove_spectator(
+                os.environ["TABLE_NAME"], connection["shard"]["S"], connection_id
+            )
         else:
-            spectators.remove(connection_id)
-            lobby["spectators"] = {"S": json.dumps(spectators)}
+            # joined before spectators were sharded
+            remove_legacy_connection(
+                os.environ["TABLE_NAME"], connection["lobby"]["S"], connection_id
+            )
 
-        put_item(
-            table_name=os.environ["TABLE_NAME"],
-            item=lobby
-        )
+        delete_connection(os.environ["TABLE_NAME"], connection_id)
 
     except Exception as e:
-        error_type = type(e).__name__ 
-        error_message = str(e) 
-        print(f"Error occurred: {error_type}: {error_message}") 
-        return { "statusCode": 500, "body": f"{error_type}: {error_message}" }
-    
+        error_type = type(e).__name__
+        error_message = str(e)
+        print(f"Error occurred: {error_type}: {error_message}")
+        return {"statusCode": 500, "body": f"{error_type}: {error_message}"}
+
     return {"statusCode": 200}
 
 
-def put_item(table_name: str, item: Dict[str, Any]) -> None:
-    ddb_client.put_item(
+def release_captain(
+    table_name: str, lobby_key: str, captain: str, connection_id: str
+) -> None:
+    # Only if the seat is still ours; the lobby may be gone or re-claimed
+    try:
+        ddb_client.update_item(
+            TableName=table_name,
+            Key={"lobbyId": {"S": lobby_key}},
+            UpdateExpression="SET #captain = :empty",
+            ConditionExpression="#captain = :id",
+            ExpressionAttributeNames={"#captain": captain},
+            ExpressionAttributeValues={
+                ":empty": {"S": ""},
+                ":id": {"S": connection_id},
+            },
+        )
+    except ddb_client.exceptions.ConditionalCheckFailedException:
+        pass
+
+
+def remove_spectator(table_name: str, shard_key: str, connection_id: str) -> None:
+    ddb_client.update_item(
         TableName=table_name,
-        Item=item
+        Key={"lobbyId": {"S": shard_key}},
+        UpdateExpression="DELETE connections :ids",
+        ExpressionAttributeValues={":ids": {"SS": [connection_id]}},
     )
 
-def get_lobby(table_name: str, connection_id: str) -> Dict[str, Any]:
-    response = ddb_client.scan(
-        TableName=table_name,
-        FilterExpression=(
-            "contains(#spectators, :connection_id) "
-            "OR #blueCaptain = :connection_id "
-            "OR #redCaptain = :connection_id"
-        ),
-        ExpressionAttributeNames={
-            "#spectators": "spectators",
-            "#blueCaptain": "blueCaptain",
-            "#redCaptain": "redCaptain"
-        },
-        ExpressionAttributeValues={
-            ":connection_id": {"S": connection_id}
-        }
+
+def remove_legacy_connection(
+    table_name: str, lobby_key: str, connection_id: str
+) -> None:
+    response = ddb_client.get_item(
+        TableName=table_name, Key={"lobbyId": {"S": lobby_key}}
     )
+    lobby = response.get("Item", {})
 
-    items = response.get("Items", [])
-    if items:
-        return items[0]
+    for captain in ("blueCaptain", "redCaptain"):
+        if lobby.get(captain, {}).get("S") == connection_id:
+            release_captain(table_name, lobby_key, captain, connection_id)
+            return
 
-    return {}
\ No newline at end of file
+    spectators = json.loads(lobby.get("spectators", {}).get("S", "[]"))
+    if connection_id not in spectators:
+        return
+
+    try:
+        ddb_client.update_item(
+            TableName=table_name,
+            Key={"lobbyId": {"S": lobby_key}},
+            UpdateExpression="SET spectators = :remaining",
+            ConditionExpression="spectators = :spectators",
+            ExpressionAttributeValues={
+                ":remaining": {
+                    "S": json.dumps([s for s in spectators if s != connection_id])
+                },
+                ":spectators": lobby["spectators"],
+            },
+        )
+    except ddb_client.exceptions.ConditionalCheckFailedException:
+        # someone else changed the list; the next broadcast prunes us as gone
+        pass
+
+
+def delete_connection(table_name: str, connection_id: str) -> None:
+    ddb_client.delete_item(
+        TableName=table_name, Key={"lobbyId": {"S": f"CONN#{connection_id}"}}
+    )
+
+
+def get_connection(table_name: str, connection_id: str) -> Dict[str, Any]:
+    # connect stores a CONN#<connection id> item saying which lobby and which
+    # seat or spectator shard the connection holds
+    response = ddb_client.get_item(
+        TableName=table_name, Key={"lobbyId": {"S": f"CONN#{connection_id}"}}
+    )
+    item = response.get("Item", {})
+    return item if item.get("lobby", {}).get("S") else {}
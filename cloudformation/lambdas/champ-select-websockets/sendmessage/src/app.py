@@ -1,12 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
+import copy
 import json
 import os
+import time
 import boto3
+from botocore.config import Config
 import traceback
 from typing import Any, Dict, Tuple
 
 ddb_client = boto3.client("dynamodb")
 
+# Broadcasts go out this many connections at a time, so a lobby with hundreds
+# of spectators takes about one round trip instead of one per connection
+BROADCAST_WORKERS = int(os.environ.get("BROADCAST_WORKERS", 32))
+# Spectators are spread over this many SPECTATORS#<lobby>#<n> items, each a
+# string set of connection IDs; see connect
+SPECTATOR_SHARDS = int(os.environ.get("SPECTATOR_SHARDS", 16))
+# One management API client per endpoint, kept while the container is warm
+apigw_clients = {}
+
+# Re-reads allowed when another message changed the lobby under us
+MAX_WRITE_ATTEMPTS = 3
+
+PICK_BAN_LISTS = (
+    "blueTeamBans",
+    "redTeamBans",
+    "blueTeamChampions",
+    "redTeamChampions",
+)
+
 
 class State(Enum):
     Waiting = 1
@@ -62,59 +85,89 @@ STATE_RULES = {
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, int]:
-    global ALL_CONNECTIONS
     global APIGW_CLIENT
 
     endpoint_url = "https://" + "/".join(
         [event["requestContext"]["domainName"], event["requestContext"]["stage"]]
     )
 
-    APIGW_CLIENT = boto3.client("apigatewaymanagementapi", endpoint_url=endpoint_url)
-    ALL_CONNECTIONS = []
+    APIGW_CLIENT = get_apigw_client(endpoint_url)
 
     connection_id = event["requestContext"]["connectionId"]
     body = json.loads(event["body"])
 
     lobby_id = body.get("LobbyId")
 
-    lobby_item, lobby = get_lobby(lobby_id=lobby_id)
+    # Both captains can act at once, so every write is conditional on the
+    # version that was read. On a conflict the lobby is re-read and the action
+    # re-checked against it; nothing is sent, to the sender or the lobby,
+    # until a write has stuck.
+    for _ in range(MAX_WRITE_ATTEMPTS):
+        lobby_item, lobby = get_lobby(lobby_id=lobby_id)
+
+        if not lobby:
+            send_message(connection_id, "No Lobby found")
+            return {"statusCode": 404}
+
+        before = copy.deepcopy(lobby)
+        replies = []
+        broadcast = handle_action(lobby, body, connection_id, replies)
+
+        try:
+            update_lobby(lobby_item, before, lobby)
+        except ddb_client.exceptions.ConditionalCheckFailedException:
+            continue
 
-    if not lobby:
-        send_message(connection_id, "No Lobby found")
-        return {"statusCode": 404}
+        for reply in replies:
+            send_message(connection_id, reply)
+        if broadcast:
+            broadcast_to_lobby(lobby_item, broadcast)
+        return {"statusCode": 200}
 
+    send_message(connection_id, "Lobby is busy, please try again")
+    return {"statusCode": 409}
+
+
+def handle_action(
+    lobby: Dict[str, Any],
+    body: Dict[str, Any],
+    connection_id: str,
+    replies: list,
+) -> str | None:
+    """
+    Apply the action to `lobby` in place and return the message to broadcast
+    once the change is saved, if any. Replies meant only for the sender are
+    collected in `replies` and sent once the attempt that produced them has
+    been saved, so a retried attempt doesn't repeat them.
+    """
     if "turn" not in lobby or lobby.get("state") not in STATE_SEQUENCE:
         lobby["turn"] = 0
         lobby["state"] = STATE_SEQUENCE[0]
 
     action = body["action"]
 
-    ALL_CONNECTIONS = lobby["spectators"] + [
-        lobby["blueCaptain"],
-        lobby["redCaptain"],
-    ]
-
     match action:
         case "BanChampion":
-            ban_champion(lobby, body["ChampionId"], connection_id)
+            return ban_champion(lobby, body["ChampionId"], connection_id, replies)
 
         case "SelectChampion":
-            select_champion(lobby, body["ChampionId"], connection_id)
+            return select_champion(lobby, body["ChampionId"], connection_id, replies)
 
         case "Start":
             if (
                 connection_id in [lobby["blueCaptain"], lobby["redCaptain"]]
                 and lobby["state"] == State.Waiting.name
             ):
-                broadcast_message(ALL_CONNECTIONS, json.dumps({"action": "Start"}))
                 advance_turn_and_state(lobby)
-            else:
-                send_message(connection_id, "Only captains can start the match")
+                return json.dumps({"action": "Start"})
+            replies.append("Only captains can start the match")
 
         case "Sync":
-            send_message(
-                connection_id,
-                json.dumps({"action": "Sync", "connectionId": connection_id, **lobby}),
+            # Spectators are no longer part of the lobby (they live in their
+            # own shard items), so Sync carries no "spectators" list; clients
+            # that showed it need another source
+            replies.append(
+                json.dumps({"action": "Sync", "connectionId": connection_id, **lobby})
             )
 
         case "Hover":
@@ -125,40 +178,34 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, int]:
                 connection_id == lobby["redCaptain"]
                 and lobby["state"].startswith("RedTeam")
             ):
-                broadcast_message(
-                    ALL_CONNECTIONS,
-                    json.dumps({"action": "Hover", "ChampionId": body["ChampionId"]}),
-                )
+                return json.dumps({"action": "Hover", "ChampionId": body["ChampionId"]})
 
         case _:
-            send_message(connection_id, "Invalid Action")
+            replies.append("Invalid Action")
 
-    update_lobby(lobby)
-    return {"statusCode": 200}
+    return None
 
 
 def authorize_action(
     lobby: Dict[str, Any],
     connection_id: str,
     action: str,
+    replies: list,
 ) -> bool:
     state = lobby.get("state")
 
     rule = STATE_RULES.get(state)
     if not rule:
-        send_message(connection_id, "Invalid lobby state")
+        replies.append("Invalid lobby state")
         return False
 
     if rule["action"] != action:
-        send_message(
-            connection_id,
-            f"Action '{action}' not allowed in state '{state}'",
-        )
+        replies.append(f"Action '{action}' not allowed in state '{state}'")
         return False
 
     expected_captain = lobby.get(rule["captain"])
     if connection_id != expected_captain:
-        send_message(connection_id, "Slow down cowboy its not your turn")
+        replies.append("Slow down cowboy its not your turn")
         return False
 
     return True
@@ -179,9 +226,10 @@ def ban_champion(
     lobby: Dict[str, Any],
     champion_id: str,
     connection_id: str,
-) -> None:
-    if not authorize_action(lobby, connection_id, "BanChampion"):
-        return
+    replies: list,
+) -> str | None:
+    if not authorize_action(lobby, connection_id, "BanChampion", replies):
+        return None
 
     lobby.setdefault("blueTeamBans", [])
     lobby.setdefault("redTeamBans", [])
@@ -192,8 +240,8 @@ def ban_champion(
         or champion_id in lobby.get("blueTeamChampions", [])
         or champion_id in lobby.get("redTeamChampions", [])
     ):
-        send_message(connection_id, "Champion already picked")
-        return
+        replies.append("Champion already picked")
+        return None
 
     team = "Blue" if lobby["state"] == State.BlueTeamBan.name else "Red"
 
@@ -202,25 +250,25 @@ def ban_champion(
     else:
         lobby["redTeamBans"].append(champion_id)
 
-    message = json.dumps(
+    advance_turn_and_state(lobby)
+
+    return json.dumps(
         {
             "action": "BanChampion",
             "ChampionId": champion_id,
             "Team": team,
         }
     )
-    broadcast_message(ALL_CONNECTIONS, message)
-
-    advance_turn_and_state(lobby)
 
 
 def select_champion(
     lobby: Dict[str, Any],
     champion_id: str,
     connection_id: str,
-) -> None:
-    if not authorize_action(lobby, connection_id, "SelectChampion"):
-        return
+    replies: list,
+) -> str | None:
+    if not authorize_action(lobby, connection_id, "SelectChampion", replies):
+        return None
 
     lobby.setdefault("blueTeamChampions", [])
     lobby.setdefault("redTeamChampions", [])
@@ -231,8 +279,8 @@ def select_champion(
         or champion_id in lobby.get("blueTeamBans", [])
         or champion_id in lobby.get("redTeamBans", [])
     ):
-        send_message(connection_id, "Champion already banned")
-        return
+        replies.append("Champion already banned")
+        return None
 
     if lobby["state"] == "BlueTeamPick":
         lobby["blueTeamChampions"].append(champion_id)
@@ -241,19 +289,28 @@ def select_champion(
         lobby["redTeamChampions"].append(champion_id)
         team = "Red"
     else:
-        send_message(connection_id, "Pick not allowed in current state")
-        return
+        replies.append("Pick not allowed in current state")
+        return None
+
+    advance_turn_and_state(lobby)
 
-    message = json.dumps(
+    return json.dumps(
         {
             "action": "SelectChampion",
             "ChampionId": champion_id,
             "Team": team,
         }
     )
-    broadcast_message(ALL_CONNECTIONS, message)
 
-    advance_turn_and_state(lobby)
+
+def get_apigw_client(endpoint_url: str):
+    if endpoint_url not in apigw_clients:
+        apigw_clients[endpoint_url] = boto3.client(
+            "apigatewaymanagementapi",
+            endpoint_url=endpoint_url,
+            config=Config(max_pool_connections=BROADCAST_WORKERS),
+        )
+    return apigw_clients[endpoint_url]
 
 
 def send_message(connection_id: str, message: str) -> None:
@@ -263,9 +320,136 @@ def send_message(connection_id: str, message: str) -> None:
     )
 
 
-def broadcast_message(connection_ids: list, message: str) -> None:
-    for connection_id in filter(None, connection_ids):
-        send_message(connection_id, message)
+def spectator_pages(lobby_id: str):
+    """
+    Yield (shard key, connection IDs) for every spectator shard of the lobby,
+    one BatchGetItem response at a time.
+    """
+    keys = [
+        {"lobbyId": {"S": f"SPECTATORS#{lobby_id}#{shard}"}}
+        for shard in range(SPECTATOR_SHARDS)
+    ]
+    table_name = os.environ["TABLE_NAME"]
+    while keys:
+        batch, keys = keys[:100], keys[100:]
+        request = {
+            table_name: {"Keys": batch, "ProjectionExpression": "lobbyId, connections"}
+        }
+        while request:
+            response = ddb_client.batch_get_item(RequestItems=request)
+            for shard in response.get("Responses", {}).get(table_name, []):
+                yield shard["lobbyId"]["S"], shard.get("connections", {}).get("SS", [])
+            request = response.get("UnprocessedKeys") or None
+
+
+def broadcast_to_lobby(item: dict, message: str) -> None:
+    """
+    Send `message` to both captains and every spectator, then drop the
+    connections API Gateway reports as gone.
+    """
+    lobby_id = item["lobbyId"]["S"].removeprefix("LOBBY#")
+    captains = [item.get(c, {}).get("S") for c in ("blueCaptain", "redCaptain")]
+    captains = [captain for captain in captains if captain]
+    # lobbies created before spectators were sharded keep a JSON list
+    legacy_spectators = json.loads(item.get("spectators", {}).get("S", "[]"))
+
+    shard_of = {}
+    for shard_key, connection_ids in spectator_pages(lobby_id):
+        for connection_id in connection_ids:
+            shard_of[connection_id] = shard_key
+
+    gone = broadcast_message(captains + legacy_spectators + list(shard_of), message)
+    if gone:
+        prune_connections(item, gone, shard_of)
+
+
+def broadcast_message(connection_ids: list, message: str) -> list:
+    """
+    Send `message` to every connection concurrently. One slow or failed
+    connection no longer holds up or aborts the rest. Returns the connections
+    API Gateway reports as gone, so they can be dropped from the lobby.
+    """
+    connection_ids = list(dict.fromkeys(filter(None, connection_ids)))
+    if not connection_ids:
+        return []
+
+    started = time.perf_counter()
+    gone, failed = [], 0
+
+    def send(connection_id):
+        try:
+            send_message(connection_id, message)
+            return None
+        except APIGW_CLIENT.exceptions.GoneException:
+            return "gone"
+        except Exception as e:
+            print(f"Error sending to {connection_id}: {type(e).__name__}: {e}")
+            return "failed"
+
+    workers = min(BROADCAST_WORKERS, len(connection_ids))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for connection_id, outcome in zip(
+            connection_ids, pool.map(send, connection_ids)
+        ):
+            if outcome == "gone":
+                gone.append(connection_id)
+            elif outcome == "failed":
+                failed += 1
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(
+        f"Broadcast to {len(connection_ids)} connections in {elapsed_ms:.0f}ms: "
+        f"{len(gone)} gone, {failed} failed"
+    )
+    return gone
+
+
+def prune_connections(item: dict, gone: list, shard_of: dict) -> None:
+    """
+    Drop connections that no longer exist: gone captains are cleared if they
+    still hold their seat, gone spectators are removed from their shard's set.
+    Set removals can't conflict, so each affected item gets one update.
+    """
+    table_name = os.environ["TABLE_NAME"]
+
+    for captain in ("blueCaptain", "redCaptain"):
+        connection_id = item.get(captain, {}).get("S")
+        if not connection_id or connection_id not in gone:
+            continue
+        try:
+            ddb_client.update_item(
+                TableName=table_name,
+                Key={"lobbyId": item["lobbyId"]},
+                UpdateExpression="SET #captain = :empty",
+                ConditionExpression="#captain = :gone",
+                ExpressionAttributeNames={"#captain": captain},
+                ExpressionAttributeValues={
+                    ":empty": {"S": ""},
+                    ":gone": {"S": connection_id},
+                },
+            )
+        except ddb_client.exceptions.ConditionalCheckFailedException:
+            pass
+
+    gone_by_shard = {}
+    for connection_id in gone:
+        if connection_id in shard_of:
+            gone_by_shard.setdefault(shard_of[connection_id], []).append(connection_id)
+    for shard_key, connection_ids in gone_by_shard.items():
+        ddb_client.update_item(
+            TableName=table_name,
+            Key={"lobbyId": {"S": shard_key}},
+            UpdateExpression="DELETE connections :gone",
+            ExpressionAttributeValues={":gone": {"SS": connection_ids}},
+        )
+
+
+def read_list(item: Dict[str, Any], key: str) -> list:
+    # native lists, or the JSON strings lobbies were created with before
+    attribute = item.get(key, {})
+    if "L" in attribute:
+        return [value["S"] for value in attribute["L"]]
+    return json.loads(attribute.get("S", "[]"))
 
 
 def get_lobby(lobby_id: str) -> Tuple[dict, Dict[str, Any]]:
@@ -273,6 +457,7 @@ def get_lobby(lobby_id: str) -> Tuple[dict, Dict[str, Any]]:
         response = ddb_client.get_item(
             TableName=os.environ["TABLE_NAME"],
             Key={"lobbyId": {"S": f"LOBBY#{lobby_id}"}},
+            ConsistentRead=True,
         )
 
         item = response.get("Item")
@@ -282,23 +467,19 @@ def get_lobby(lobby_id: str) -> Tuple[dict, Dict[str, Any]]:
         turn_raw = item.get("turn", {}).get("N")
         turn = int(turn_raw) if turn_raw is not None else 0
 
-        return (
-            item,
-            {
-                "lobbyId": lobby_id,
-                "blueCaptain": item.get("blueCaptain", {}).get("S"),
-                "redCaptain": item.get("redCaptain", {}).get("S"),
-                "spectators": json.loads(item["spectators"]["S"]),
-                "state": item.get("state", {}).get("S"),
-                "preBans": json.loads(item["preBans"]["S"]),
-                "blueTeamBans": json.loads(item.get("blueTeamBans", {}).get("S", "[]")),
-                "redTeamBans": json.loads(item.get("redTeamBans", {}).get("S", "[]")),
-                "redTeamChampions": json.loads(item["redTeamChampions"]["S"]),
-                "blueTeamChampions": json.loads(item["blueTeamChampions"]["S"]),
-                "turn": turn,
-                "TTL": item.get("TTL", {}).get("N"),
-            },
-        )
+        lobby = {
+            "lobbyId": lobby_id,
+            "blueCaptain": item.get("blueCaptain", {}).get("S"),
+            "redCaptain": item.get("redCaptain", {}).get("S"),
+            "state": item.get("state", {}).get("S"),
+            "preBans": json.loads(item["preBans"]["S"]),
+            "turn": turn,
+            "TTL": item.get("TTL", {}).get("N"),
+        }
+        for key in PICK_BAN_LISTS:
+            lobby[key] = read_list(item, key)
+
+        return item, lobby
 
     except Exception as e:
         print(f"Error fetching lobby {lobby_id}: {e}")
@@ -306,21 +487,57 @@ def get_lobby(lobby_id: str) -> Tuple[dict, Dict[str, Any]]:
         return {}, {}
 
 
-def update_lobby(lobby: Dict[str, Any]) -> None:
-    ddb_client.put_item(
+def update_lobby(item: dict, before: Dict[str, Any], lobby: Dict[str, Any]) -> None:
+    """
+    Write only what changed between `before` and `lobby`: new bans and picks
+    are appended, turn and state are set. The write only goes through if
+    nobody else has written since `item` was read; otherwise DynamoDB raises
+    ConditionalCheckFailedException. Nothing changed means nothing written.
+    """
+    updates = []
+    names = {}
+    values = {}
+
+    for key in PICK_BAN_LISTS:
+        added = lobby[key][len(before[key]) :]
+        if not added:
+            continue
+        names[f"#{key}"] = key
+        if "L" in item.get(key, {}):
+            updates.append(f"#{key} = list_append(#{key}, :{key})")
+            values[f":{key}"] = {"L": [{"S": value} for value in added]}
+        else:
+            # still a JSON string from before; store it as a list from now on
+            updates.append(f"#{key} = :{key}")
+            values[f":{key}"] = {"L": [{"S": value} for value in lobby[key]]}
+
+    if lobby["turn"] != before.get("turn"):
+        updates.append("#turn = :turn")
+        names["#turn"] = "turn"
+        values[":turn"] = {"N": str(int(lobby["turn"]))}
+    if lobby["state"] != before.get("state"):
+        updates.append("#state = :state")
+        names["#state"] = "state"
+        values[":state"] = {"S": lobby["state"]}
+
+    if not updates:
+        return
+
+    version = item.get("version", {}).get("N")
+    names["#version"] = "version"
+    values[":next_version"] = {"N": str(int(version or 0) + 1)}
+    updates.append("#version = :next_version")
+    if version is None:
+        condition = "attribute_not_exists(#version)"
+    else:
+        condition = "#version = :version"
+        values[":version"] = {"N": version}
+
+    ddb_client.update_item(
         TableName=os.environ["TABLE_NAME"],
-        Item={
-            "lobbyId": {"S": f"LOBBY#{lobby['lobbyId']}"},
-            "blueCaptain": {"S": lobby["blueCaptain"]},
-            "redCaptain": {"S": lobby["redCaptain"]},
-            "spectators": {"S": json.dumps(lobby["spectators"])},
-            "state": {"S": lobby["state"]},
-            "preBans": {"S": json.dumps(lobby["preBans"])},
-            "blueTeamBans": {"S": json.dumps(lobby.get("blueTeamBans", []))},
-            "redTeamBans": {"S": json.dumps(lobby.get("redTeamBans", []))},
-            "redTeamChampions": {"S": json.dumps(lobby["redTeamChampions"])},
-            "blueTeamChampions": {"S": json.dumps(lobby["blueTeamChampions"])},
-            "turn": {"N": str(int(lobby.get("turn", 0)))},
-            "TTL": {"N": str(int(lobby.get("TTL", 0)))},
-        },
+        Key={"lobbyId": {"S": f"LOBBY#{lobby['lobbyId']}"}},
+        UpdateExpression="SET " + ", ".join(updates),
+        ConditionExpression=condition,
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values,
     )
@@ -8,9 +8,21 @@ ddb_client = boto3.client("dynamodb")
 def lambda_handler(event, context):
     table_name = os.environ["TABLE_NAME"]
 
-    scan_result = ddb_client.scan(TableName=table_name)
-
-    lobbies = [deserialize_item(item) for item in scan_result.get("Items", [])]
+    # the table also holds CONN#<connection id> items mapping websocket
+    # connections to their lobby and SPECTATORS#<lobby>#<n> spectator shards.
+    # The filter applies after each 1 MB page, so follow every page.
+    lobbies = []
+    scan_kwargs = {
+        "TableName": table_name,
+        "FilterExpression": "begins_with(lobbyId, :lobby_prefix)",
+        "ExpressionAttributeValues": {":lobby_prefix": {"S": "LOBBY#"}},
+    }
+    while True:
+        scan_result = ddb_client.scan(**scan_kwargs)
+        lobbies += [deserialize_item(item) for item in scan_result.get("Items", [])]
+        if "LastEvaluatedKey" not in scan_result:
+            break
+        scan_kwargs["ExclusiveStartKey"] = scan_result["LastEvaluatedKey"]
 
     return response(200, {"lobbies": lobbies})
 
@@ -34,6 +46,8 @@ def deserialize_item(item):
 
         elif dtype == "N":
             out[key] = int(dval)
+        elif dtype == "L":
+            out[key] = [next(iter(value.values())) for value in dval]
         else:
             out[key] = dval
 
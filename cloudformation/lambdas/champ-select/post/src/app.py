@@ -2,9 +2,9 @@ import json
 import os
 import uuid
 import boto3
-import pymysql
 from typing import Any, Dict
 from datetime import datetime, timedelta
+from db import get_connection, release_connection
 
 ddb_client = boto3.client("dynamodb")
 
@@ -13,17 +13,6 @@ SELECT_BANNEDCHAMP_SQL = """
 """
 
 
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor,
-    )
-
-
 def lambda_handler(event, context):
 
     lobby_guid = str(uuid.uuid4())
@@ -31,25 +20,26 @@ def lambda_handler(event, context):
     lobby_id = f"LOBBY#{lobby_guid}"
 
     try:
-        connection = create_connection()
+        connection = get_connection()
         row = None
-        with connection.cursor() as cursor:
-            cursor.execute(SELECT_BANNEDCHAMP_SQL)
-            row = cursor.fetchone()
-
-        connection.close()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(SELECT_BANNEDCHAMP_SQL)
+                row = cursor.fetchone()
+        finally:
+            release_connection(connection)
 
         item = {
             "lobbyId": {"S": lobby_id},
             "redCaptain": {"S": ""},
             "blueCaptain": {"S": ""},
-            "spectators": {"S": "[]"},
             "state": {"S": "Waiting"},
             "preBans": {"S": row["value"] if row else "[]"},
-            "blueTeamBans": {"S": "[]"},
-            "redTeamBans": {"S": "[]"},
-            "redTeamChampions": {"S": "[]"},
-            "blueTeamChampions": {"S": "[]"},
+            "blueTeamBans": {"L": []},
+            "redTeamBans": {"L": []},
+            "redTeamChampions": {"L": []},
+            "blueTeamChampions": {"L": []},
+            "version": {"N": "0"},
             "TTL": {"N": str(round((datetime.now() + timedelta(days=1)).timestamp()))},
         }
 
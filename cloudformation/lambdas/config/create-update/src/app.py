@@ -1,24 +1,13 @@
 import base64
 import json
-import os
-import pymysql
 from datetime import datetime
+from db import get_connection, release_connection
 
 INSERT_CONFIG_SQL = """
     INSERT INTO config (name, value)
     VALUES (%s, %s)
 """
 
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor
-    )
-
 def lambda_handler(event, context):
     # can be { "name": "...", "value": "..." } or [ {...}, {...} ]
     try:
@@ -80,7 +69,7 @@ def lambda_handler(event, context):
     updated = []
 
     try:
-        connection = create_connection()
+        connection = get_connection()
         with connection.cursor() as cursor:
             names = list(valid_items.keys())
             format_strings = ",".join(["%s"] * len(names))
@@ -138,4 +127,4 @@ def lambda_handler(event, context):
         }
     finally:
         if connection:
-            connection.close()
+            release_connection(connection)
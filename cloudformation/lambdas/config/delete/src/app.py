@@ -1,6 +1,5 @@
 import json
-import os
-import pymysql
+from db import get_connection, release_connection
 
 DELETE_CONFIG_SQL = """
     DELETE FROM config
@@ -10,16 +9,6 @@ DELETE_CONFIG_SQL = """
 def validate_config_data(config_data) -> bool:
     return config_data.get("name", "").strip()
 
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor
-    )
-
 def lambda_handler(event, context):
 
     request_id = context.aws_request_id
@@ -40,7 +29,7 @@ def lambda_handler(event, context):
     connection = None
 
     try:
-        connection = create_connection()
+        connection = get_connection()
 
         with connection.cursor() as cursor:
             cursor.execute(
@@ -79,4 +68,4 @@ def lambda_handler(event, context):
 
     finally:
         if connection:
-            connection.close()
+            release_connection(connection)
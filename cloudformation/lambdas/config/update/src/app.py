@@ -1,8 +1,8 @@
 import base64
 import json
-import os
 import pymysql
 from datetime import datetime
+from db import get_connection, release_connection
 
 def validate_config_data(config_data) -> bool:
 
@@ -19,16 +19,6 @@ def validate_config_data(config_data) -> bool:
 
     return True
 
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor
-    )
-
 def build_update_query(config_data):
     update_fields = []
     values = []
@@ -60,7 +50,7 @@ def lambda_handler(event, context):
     connection = None
 
     try:   
-        connection = create_connection()
+        connection = get_connection()
         
         update_fields, values = build_update_query(config_data)
         
@@ -138,4 +128,4 @@ def lambda_handler(event, context):
 
     finally:
         if connection:
-            connection.close()
+            release_connection(connection)
@@ -1,16 +1,5 @@
 import json
-import os
-import pymysql
-
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor
-    )
+from db import get_connection, release_connection
 
 def response(status_code, body):
     return {
@@ -159,7 +148,7 @@ def lambda_handler(event, context):
     except json.JSONDecodeError:
         return response(400, {"message": "Invalid JSON body"})
     
-    connection = create_connection()
+    connection = get_connection()
 
     ok, err, selections = validate_selection_payload(body_json)
     if not ok:
@@ -216,4 +205,4 @@ def lambda_handler(event, context):
 
     finally:
         if connection:
-            connection.close()
\ No newline at end of file
+            release_connection(connection)
\ No newline at end of file
@@ -0,0 +1,127 @@
+import json
+import logging
+import time
+import traceback
+from db import get_connection, release_connection
+from leaderboard import rebuild_ranks
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Fantasy points per unit of each processed_match_data stat
+POINTS_PER_STAT = {
+    "kills": 3,
+    "deaths": -1,
+    "assists": 2,
+    "totalMinionsKilled": 0.02,
+    "vision_score": 0.05,
+    "totalDamageDealtToChampions": 0.0005,
+    "damageDealtToTurrets": 0.0005,
+    "objectivesStolen": 3,
+}
+WIN_POINTS = 2
+
+
+def points_expression() -> str:
+    terms = [
+        f"{weight} * COALESCE(pmd.{stat}, 0)"
+        for stat, weight in POINTS_PER_STAT.items()
+    ]
+    terms.append(f"IF(pmd.win = 'true', {WIN_POINTS}, 0)")
+    return " + ".join(terms)
+
+
+# Points for every player in every processed tournament game not scored yet.
+# Each (match, player) is computed once and kept, however many lineups
+# picked that player.
+INSERT_NEW_POINTS_SQL = f"""
+    INSERT INTO dreamdraft_player_points (match_id, player_id, points)
+    SELECT pmd.match_id, ra.player_id, ROUND({points_expression()}, 2)
+    FROM processed_match_data pmd
+    JOIN tournament_matches tm ON tm.tournament_match_id = pmd.match_id
+    JOIN riot_accounts ra ON ra.account_puuid = pmd.account_puuid
+    LEFT JOIN dreamdraft_player_points dpp
+        ON dpp.match_id = pmd.match_id AND dpp.player_id = ra.player_id
+    WHERE dpp.match_id IS NULL;
+"""
+
+DELETE_ALL_POINTS_SQL = "DELETE FROM dreamdraft_player_points"
+
+# Every lineup's score is the sum of its five players' running totals, so the
+# per-user work is five lookups into a table with one row per player.
+SET_SCORES_SQL = """
+    UPDATE profiles p
+    LEFT JOIN (
+        SELECT d.user_id, ROUND(SUM(totals.points)) AS score
+        FROM dreamdraft d
+        JOIN (
+            SELECT player_id, SUM(points) AS points
+            FROM dreamdraft_player_points
+            GROUP BY player_id
+        ) totals ON totals.player_id IN (
+            d.selection_1, d.selection_2, d.selection_3, d.selection_4, d.selection_5
+        )
+        GROUP BY d.user_id
+    ) s ON s.user_id = p.id
+    SET p.dd_score = COALESCE(s.score, 0);
+"""
+
+
+def lambda_handler(event, context):
+    started = time.perf_counter()
+    # {"full": true} recomputes every game's points, e.g. after changing
+    # POINTS_PER_STAT
+    event = event or {}
+    full = bool(event.get("full"))
+    connection = get_connection()
+
+    try:
+        with connection.cursor() as cursor:
+            if full:
+                cursor.execute(DELETE_ALL_POINTS_SQL)
+            cursor.execute(INSERT_NEW_POINTS_SQL)
+            new_points = cursor.rowcount
+
+            # lineups can be edited and profiles created at any time, so
+            # lineups are re-summed and ranks rebuilt on every run rather than
+            # only when new games arrive
+            cursor.execute(SET_SCORES_SQL)
+            updated = cursor.rowcount
+            rebuild_ranks(cursor, "dream-draft")
+        connection.commit()
+
+    except Exception as e:
+        connection.rollback()
+        logger.error(traceback.format_exc())
+        logger.error(f"Error scoring dream draft: {str(e)}")
+        return {
+            "statusCode": 500,
+            "headers": {
+                "Content-Type": "application/json",
+                "Access-Control-Allow-Origin": "*",
+            },
+            "body": json.dumps({"message": f"Failed to score dream draft: {e}"}),
+        }
+    finally:
+        release_connection(connection)
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"Scored {new_points} new player games, {updated} profiles updated "
+        f"in {elapsed:.2f}s"
+    )
+
+    return {
+        "statusCode": 201,
+        "headers": {
+            "Content-Type": "application/json",
+            "Access-Control-Allow-Origin": "*",
+        },
+        "body": json.dumps(
+            {
+                "full": full,
+                "player_games_scored": new_points,
+                "profiles_updated": updated,
+            }
+        ),
+    }
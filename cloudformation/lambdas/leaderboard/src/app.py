@@ -1,10 +1,16 @@
 import json
-import os
 import traceback
-import pymysql
+from db import get_connection, release_connection
+from leaderboard import BOARDS
 
+PAGE_SIZE = 8
+DEFAULT_NEIGHBOURS = 2
+MAX_NEIGHBOURS = 10
 
-GET_LEADERBOARD_SQL = """
+# Ranks live in leaderboard_ranks, rebuilt by the scoring jobs on every run,
+# so every read below is a seek on its (board, rank) or (board, profile_id)
+# key and this handler never writes.
+RANKED_PROFILES_SQL = """
 SELECT
     p.id,
     p.name,
@@ -12,13 +18,20 @@ SELECT
     p.avatar_url,
     p.pickems_score,
     p.dd_score,
-    ROW_NUMBER() OVER (ORDER BY p.pickems_score DESC, p.id ASC) AS rank
-FROM profiles AS p
-ORDER BY {column} DESC, p.id ASC
-LIMIT 8 OFFSET %s
+    lr.`rank` AS `rank`
+FROM leaderboard_ranks AS lr
+JOIN profiles AS p ON p.id = lr.profile_id
+WHERE lr.board = %s AND lr.`rank` BETWEEN %s AND %s
+ORDER BY lr.`rank` ASC
 """
 
-GET_TOTAL_PAGES_SQL = "SELECT CEIL(COUNT(*) / 8) AS total_pages FROM profiles"
+GET_RANKED_COUNT_SQL = """
+SELECT MAX(`rank`) AS ranked FROM leaderboard_ranks WHERE board = %s
+"""
+
+GET_PROFILE_RANK_SQL = """
+SELECT `rank` FROM leaderboard_ranks WHERE board = %s AND profile_id = %s
+"""
 
 
 def response(status_code, body):
@@ -32,52 +45,93 @@ def response(status_code, body):
     }
 
 
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor,
-    )
+def ranked_count(connection, board: str) -> int:
+    with connection.cursor() as cur:
+        cur.execute(GET_RANKED_COUNT_SQL, (board,))
+        ranked = cur.fetchone()["ranked"]
+    # nothing ranked until the board's scoring job has run once
+    return int(ranked or 0)
+
+
+def ranked_profiles(connection, board: str, first: int, last: int) -> list:
+    with connection.cursor() as cur:
+        cur.execute(RANKED_PROFILES_SQL, (board, first, last))
+        return cur.fetchall()
+
+
+def get_page(connection, board: str, qparams: dict) -> dict:
+    # ?after=<rank> continues from the last rank of the previous page; ?page=n
+    # is the same seek, since ranks are numbered 1..n without gaps.
+    if "after" in qparams:
+        after = max(0, int(qparams["after"]))
+    else:
+        after = (max(1, int(qparams.get("page", 1))) - 1) * PAGE_SIZE
+
+    total = ranked_count(connection, board)
+    rows = ranked_profiles(connection, board, after + 1, after + PAGE_SIZE)
+
+    last_rank = rows[-1]["rank"] if rows else None
+    return {
+        "items": rows,
+        "pages": -(-total // PAGE_SIZE),
+        "page": after // PAGE_SIZE + 1,
+        "next_after": last_rank if last_rank and last_rank < total else None,
+    }
+
+
+def get_profile_rank(connection, board: str, profile_id: int, qparams: dict):
+    neighbours = int(qparams.get("neighbours", DEFAULT_NEIGHBOURS))
+    neighbours = min(max(neighbours, 0), MAX_NEIGHBOURS)
+
+    total = ranked_count(connection, board)
+    with connection.cursor() as cur:
+        cur.execute(GET_PROFILE_RANK_SQL, (board, profile_id))
+        row = cur.fetchone()
+    if row is None:
+        return None
+
+    rank = row["rank"]
+    return {
+        "rank": rank,
+        "ranked": total,
+        "items": ranked_profiles(
+            connection, board, max(1, rank - neighbours), rank + neighbours
+        ),
+    }
 
 
 def lambda_handler(event, context):
     path_params = event.get("pathParameters") or {}
     leaderboard_type = path_params.get("board")
 
-    if leaderboard_type not in ["pickems", "dream-draft"]:
+    if leaderboard_type not in BOARDS:
         return response(404, {"message": "Requested leaderboard could not be found"})
 
     qparams = event.get("queryStringParameters") or {}
-    page = int(qparams.get("page", 1))
-
-    match leaderboard_type:
-        case "pickems":
-            score_column = "pickems_score"
-        case "dream-draft":
-            score_column = "dd_score"
-        case _:
-            return response(400, {"message": "Invalid leaderboard type"})
+    profile_id = path_params.get("profile_id")
 
+    connection = None
     try:
-        connection = create_connection()
+        connection = get_connection()
+
+        if profile_id is None:
+            return response(200, get_page(connection, leaderboard_type, qparams))
 
-        with connection.cursor() as cur:
-            cur.execute(
-                GET_LEADERBOARD_SQL.format(column=score_column),
-                ((page - 1) * 8),
+        result = get_profile_rank(
+            connection, leaderboard_type, int(profile_id), qparams
+        )
+        if result is None:
+            return response(
+                404, {"message": f"Profile {profile_id} is not on this leaderboard"}
             )
-            rows = cur.fetchall()
-            cur.execute(GET_TOTAL_PAGES_SQL)
-            total_pages = cur.fetchone()["total_pages"]
+        return response(200, result)
 
-        return response(200, {"items": rows, "pages": int(total_pages), "page": page})
+    except ValueError:
+        return response(400, {"message": "Invalid page, rank or profile id"})
 
     except Exception as e:
-        return response(500, {"message": f"{e}", "tracebakc": traceback.format_exc(e)})
+        return response(500, {"message": f"{e}", "traceback": traceback.format_exc()})
 
     finally:
         if connection:
-            connection.close()
+            release_connection(connection)
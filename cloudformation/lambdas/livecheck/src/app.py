@@ -2,8 +2,8 @@ import os
 import json
 import requests
 import boto3
-import pymysql
 import traceback
+from db import get_connection, release_connection
 
 TWITCH_STREAMS_URL = "https://api.twitch.tv/helix/streams"
 GET_CHANNEL_NAME_SQL = 'SELECT value FROM config WHERE name = "twitch_channel"'
@@ -18,17 +18,6 @@ def get_access_token(secret_arn: str) -> str:
     return secret_data["access_token"]
 
 
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor,
-    )
-
-
 def response(status_code, body):
     return {
         "statusCode": status_code,
@@ -45,7 +34,7 @@ def lambda_handler(event, context):
     secret_arn = os.environ.get("TWITCH_APP_SECRET_ARN")
 
     try:
-        connection = create_connection()
+        connection = get_connection()
 
         with connection.cursor() as cursor:
             cursor.execute(GET_CHANNEL_NAME_SQL)
@@ -83,4 +72,4 @@ def lambda_handler(event, context):
 
     finally:
         if connection:
-            connection.close()
+            release_connection(connection)
@@ -1,113 +1,263 @@
 import json
 import os
-import pymysql
 import logging
 import traceback
 import requests
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from db import get_connection, release_connection
+from riot import get_client, RiotRateLimited
+from budget import TimeBudget
+from match_queue import FETCH_STAGE, claim_matches, release_matches, count_stage
+from match_store import get_store
+from handoff import hand_off
+from polling import reschedule
 
-RIOT_API_KEY = os.environ["RIOT_API_KEY"]
 REGION = "europe"
-connection = None
-match_data_url = f"https://{REGION}.api.riotgames.com/lol/match/v5/matches"
+MATCH_DATA_ROUTE = "/lol/match/v5/matches/{match_id}"
+BATCH_SIZE = int(os.environ.get("MATCH_DATA_BATCH_SIZE", 50))
+FETCH_WORKERS = int(os.environ.get("MATCH_DATA_FETCH_WORKERS", 8))
+# Transient failures a match gets before it is given up on
+MAX_FETCH_ATTEMPTS = int(os.environ.get("MATCH_DATA_MAX_ATTEMPTS", 5))
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-GET_MATCH_IDS_SQL = """
-    SELECT match_id
+# Rows fetched before payloads moved to the match store still carry them inline
+GET_INLINE_MATCH_DATA_SQL_TMPL = """
+    SELECT match_id, match_data
     FROM match_history
-    WHERE match_data IS NULL
-    LIMIT 5;
+    WHERE match_id IN ({inlist}) AND match_data IS NOT NULL;
 """
 
+# Rows already exist, so this only ever takes the UPDATE branch. Written as an
+# INSERT so executemany() can send the whole batch as one multi-row statement.
+# Storing the pointer also drops any inline payload and hands the lease back.
 UPDATE_MATCH_HISTORY_SQL = """
-    UPDATE match_history
-    SET match_data = %s
-    WHERE match_id = %s;
+    INSERT INTO match_history (match_id, match_data_key, match_data_size, queue_id, game_creation)
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        match_data_key = VALUES(match_data_key),
+        match_data_size = VALUES(match_data_size),
+        queue_id = VALUES(queue_id),
+        game_creation = VALUES(game_creation),
+        match_data = NULL,
+        lease_owner = NULL,
+        lease_expires_at = NULL;
 """
 
-
-def get_connection() -> pymysql.Connection:
-    global connection
-    if connection is None:
-        connection = pymysql.connect(
-            host=os.environ["DB_HOST"],
-            port=int(os.environ["DB_PORT"]),
-            user=os.environ["DB_USER"],
-            password=os.environ["DB_PASSWORD"],
-            database=os.environ["DB_NAME"],
-            cursorclass=pymysql.cursors.DictCursor,
-        )
-    return connection
+# A failed match keeps its lease, which backs it off until the lease expires.
+# Riot rejecting the ID outright (4xx) or running out of attempts sets
+# fetch_error, which takes the row out of FETCH_STAGE for good. MySQL applies
+# SET assignments left to right, so fetch_attempts is already incremented.
+RECORD_FETCH_FAILURE_SQL = """
+    UPDATE match_history
+    SET fetch_attempts = fetch_attempts + 1,
+        fetch_error = IF(%s OR fetch_attempts >= %s, %s, NULL)
+    WHERE match_id = %s AND lease_owner = %s;
+"""
 
 
-def fetch_match_ids() -> list:
+def fetch_match_ids(worker_id: str) -> list:
     connection = get_connection()
     match_ids = []
     try:
-        with connection.cursor() as cursor:
-            cursor.execute(GET_MATCH_IDS_SQL)
-            results = cursor.fetchall()
-            match_ids = [row["match_id"] for row in results]
-            logger.info(f"Fetched {len(match_ids)} matches from database.")
+        match_ids = claim_matches(connection, FETCH_STAGE, worker_id, BATCH_SIZE)
+        logger.info(f"Claimed {len(match_ids)} matches from database.")
     except Exception as e:
         logger.error(traceback.format_exc())
         logger.error(f"Error fetching match_ids: {str(e)}")
     return match_ids
 
 
-def fetch_match_data(match_id):
-    url = f"{match_data_url}/{match_id}"
-    headers = {"X-Riot-Token": RIOT_API_KEY}
-    response = requests.get(url, headers=headers, timeout=10)
-    if response.status_code == 429:
-        logger.warning("Rate limited by Riot API.")
-        raise Exception("Rate limited by Riot API.")
+def fetch_inline_match_data(match_ids: list) -> dict:
+    if not match_ids:
+        return {}
+
+    connection = get_connection()
+    placeholders = ",".join(["%s"] * len(match_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            GET_INLINE_MATCH_DATA_SQL_TMPL.format(inlist=placeholders), match_ids
+        )
+        return {row["match_id"]: row["match_data"] for row in cursor.fetchall()}
+
+
+def fetch_match_data(match_id) -> bytes:
+    response = get_client().get(REGION, MATCH_DATA_ROUTE, match_id=match_id)
     response.raise_for_status()
-    return response.json()
+    return response.content
+
+
+def match_history_row(match_id, key: str, size: int, raw: bytes | str) -> tuple:
+    info = json.loads(raw).get("info") or {}
+    return (match_id, key, size, info.get("queueId"), info.get("gameCreation"))
+
+
+def fetch_and_store(match_id, inline: bytes | str | None = None) -> tuple[tuple, str]:
+    """
+    Get the payload into the match store and return its match_history row,
+    plus where the payload came from: "inline" (moved out of MySQL), "cache"
+    (already in the store, e.g. the row was deleted and re-added) or "riot".
+    """
+    store = get_store()
+
+    if inline is not None:
+        key, size = store.put(match_id, inline)
+        return match_history_row(match_id, key, size, inline), "inline"
+
+    cached = store.find(match_id)
+    if cached is not None:
+        key, size, raw = cached
+        return match_history_row(match_id, key, size, raw), "cache"
+
+    raw = fetch_match_data(match_id)
+    key, size = store.put(match_id, raw)
+    return match_history_row(match_id, key, size, raw), "riot"
+
+
+def fetch_match_data_concurrently(match_ids: list) -> tuple[dict, dict, Counter]:
+    """
+    Fetch every match payload on a bounded thread pool and write it to the
+    match store. The shared Riot client keeps the pool inside the rate limit.
+    Payloads still stored inline are moved without calling Riot.
+
+    Returns the match_history rows fetched, the failures as match_id ->
+    (error, terminal) where terminal means Riot rejected the ID outright,
+    and where each payload came from. If Riot rate limits us the remaining
+    fetches are cancelled and left out of both, for the next run.
+    """
+    rows = {}
+    failed = {}
+    sources = Counter()
+    rate_limited = False
+    inline = fetch_inline_match_data(match_ids)
+
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        futures = {
+            pool.submit(fetch_and_store, match_id, inline.pop(match_id, None)): match_id
+            for match_id in match_ids
+        }
 
+        for future in as_completed(futures):
+            match_id = futures[future]
+            if future.cancelled():
+                # stopped by the rate limit; released with the deferred IDs
+                continue
+            try:
+                rows[match_id], source = future.result()
+                sources[source] += 1
+                continue
+            except RiotRateLimited as e:
+                stop = str(e)
+            except requests.exceptions.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if status != 429:
+                    logger.error(f"Error fetching match_data for {match_id}: {e}")
+                    terminal = status is not None and status < 500
+                    failed[match_id] = (f"HTTP {status}", terminal)
+                    continue
+                stop = "Rate limited by Riot API"
+            except Exception as e:
+                logger.error(f"Error fetching match_data for {match_id}: {e}")
+                failed[match_id] = (f"{type(e).__name__}: {e}"[:255], False)
+                continue
+
+            # a 429 here is not this match's fault; it goes back with the rest
+            if not rate_limited:
+                logger.warning(f"Stopping batch early: {stop}")
+            rate_limited = True
+            for pending in futures:
+                pending.cancel()
+
+    return rows, failed, sources
+
+
+def record_fetch_failures(failed: dict, worker_id: str) -> None:
+    if not failed:
+        return
 
-def update_match_data(match_id, match_data):
     connection = get_connection()
-    match_data_json = json.dumps(match_data)
-    try:
-        with connection.cursor() as cursor:
-            cursor.execute(UPDATE_MATCH_HISTORY_SQL, (match_data_json, match_id))
-            logger.info(f"Updated {match_id} with match_data in database.")
-        connection.commit()
-    except Exception as e:
-        logger.error(traceback.format_exc())
-        logger.error(f"Error fetching match_ids: {str(e)}")
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            RECORD_FETCH_FAILURE_SQL,
+            [
+                (terminal, MAX_FETCH_ATTEMPTS, error, match_id, worker_id)
+                for match_id, (error, terminal) in failed.items()
+            ],
+        )
+    connection.commit()
+    given_up = [match_id for match_id, (_, terminal) in failed.items() if terminal]
+    if given_up:
+        logger.warning(f"Riot rejected {len(given_up)} match IDs: {given_up}")
 
 
-def close_connection():
+def update_match_data(rows: dict):
+    if not rows:
+        return
+
     connection = get_connection()
-    if connection:
-        connection.close()
-    connection = None
+    with connection.cursor() as cursor:
+        cursor.executemany(UPDATE_MATCH_HISTORY_SQL, list(rows.values()))
+    connection.commit()
+    logger.info(f"Stored match_data for {len(rows)} matches.")
 
 
 def lambda_handler(event, context):
-    match_ids = fetch_match_ids()
-
-    for match_id in match_ids:
-        try:
-            match_data = fetch_match_data(match_id)
-            update_match_data(match_id, match_data)
-        except Exception as e:
-            logger.error(traceback.format_exc())
-            logger.error(
-                f"Error fetching match_data for Match ID: {match_id}, error: {str(e)}"
-            )
-            close_connection()
-            return {
-                "statusCode": 500,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*",
-                },
-            }
+    worker_id = context.aws_request_id
+    budget = TimeBudget(context)
+    fetched = 0
+    failed = 0
+    deferred = 0
+    sources = Counter()
 
-    close_connection()
+    try:
+        # keep draining until the time budget or the backlog runs out
+        while budget.has_time() and not deferred:
+            with budget.chunk():
+                match_ids = fetch_match_ids(worker_id)
+                if not match_ids:
+                    break
+
+                rows, chunk_failed, chunk_sources = fetch_match_data_concurrently(
+                    match_ids
+                )
+                update_match_data(rows)
+                hand_off(list(rows))
+                record_fetch_failures(chunk_failed, worker_id)
+
+                # failed matches keep their lease until it expires, which backs
+                # them off; matches we never got to are handed back right away
+                deferred_ids = [
+                    match_id
+                    for match_id in match_ids
+                    if match_id not in rows and match_id not in chunk_failed
+                ]
+                release_matches(get_connection(), deferred_ids, worker_id)
+
+                fetched += len(rows)
+                failed += len(chunk_failed)
+                sources += chunk_sources
+                deferred = len(deferred_ids)
+
+        backlog = count_stage(get_connection(), FETCH_STAGE)
+        next_run_minutes = reschedule(backlog)
+        logger.info(
+            f"Match cache: {sources['cache']} hits, {sources['riot']} misses "
+            f"fetched from Riot, {sources['inline']} moved from MySQL."
+        )
+
+    except Exception as e:
+        logger.error(traceback.format_exc())
+        logger.error(f"Error saving match_data: {str(e)}")
+        return {
+            "statusCode": 500,
+            "headers": {
+                "Content-Type": "application/json",
+                "Access-Control-Allow-Origin": "*",
+            },
+        }
+    finally:
+        release_connection()
 
     return {
         "statusCode": 200,
@@ -115,4 +265,15 @@ def lambda_handler(event, context):
             "Content-Type": "application/json",
             "Access-Control-Allow-Origin": "*",
         },
+        "body": json.dumps(
+            {
+                "matches_fetched": fetched,
+                "matches_failed": failed,
+                "matches_deferred": deferred,
+                "cache_hits": sources["cache"],
+                "cache_misses": sources["riot"],
+                "backlog": backlog,
+                "next_run_minutes": next_run_minutes,
+            }
+        ),
     }
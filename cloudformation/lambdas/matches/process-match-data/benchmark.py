@@ -0,0 +1,142 @@
+"""
+Micro-benchmark for match payload parsing in process-match-data.
+
+Compares, for one processing chunk of match-v5 sized payloads (~75 KB each):
+  full    - json.loads every payload and keep the dicts (previous behaviour)
+  slim    - parse_match_payload, keeping only the fields we process
+  ijson   - event-streaming extraction, if ijson is installed
+
+Run from this directory:  python benchmark.py [chunk_size] [rounds]
+"""
+
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, "src")
+from payload import PARTICIPANT_FIELDS, parse_match_payload  # noqa: E402
+
+
+def make_participant(index: int) -> dict:
+    participant = {f"stat{k}": random.randint(0, 100000) for k in range(110)}
+    participant.update({field: random.randint(0, 30000) for field in PARTICIPANT_FIELDS})
+    participant.update(
+        {
+            "puuid": f"{index:02d}" + "x" * 76,
+            "riotIdGameName": f"Player{index}",
+            "riotIdTagline": "EUW",
+            "championName": "Ahri",
+            "teamPosition": "MIDDLE",
+            "win": index < 5,
+        }
+    )
+    participant["challenges"] = {
+        f"challenge{k}": random.random() * 1000 for k in range(125)
+    }
+    participant["perks"] = {
+        "statPerks": {"defense": 5001, "flex": 5008, "offense": 5005},
+        "styles": [
+            {
+                "description": "primaryStyle",
+                "selections": [{"perk": 8112, "var1": 1, "var2": 0, "var3": 0}] * 4,
+                "style": 8100,
+            },
+            {
+                "description": "subStyle",
+                "selections": [{"perk": 8139, "var1": 1, "var2": 0, "var3": 0}] * 2,
+                "style": 8000,
+            },
+        ],
+    }
+    participant["missions"] = {f"playerScore{k}": 0 for k in range(12)}
+    return participant
+
+
+def make_payload() -> str:
+    return json.dumps(
+        {
+            "metadata": {"dataVersion": "2", "matchId": "EUW1_1", "participants": []},
+            "info": {
+                "gameCreation": 1700000000000,
+                "gameDuration": 1800,
+                "queueId": 420,
+                "participants": [make_participant(i) for i in range(10)],
+                "teams": [
+                    {
+                        "bans": [{"championId": 1, "pickTurn": k} for k in range(5)],
+                        "objectives": {"baron": {"first": True, "kills": 1}},
+                        "teamId": team_id,
+                        "win": team_id == 100,
+                    }
+                    for team_id in (100, 200)
+                ],
+            },
+        }
+    )
+
+
+def parse_full(raw):
+    return json.loads(raw)
+
+
+def parse_ijson(raw):
+    import ijson
+
+    prefix_root = "info.participants.item"
+    info = {"participants": []}
+    participant = None
+    for prefix, event, value in ijson.parse(raw):
+        if prefix == prefix_root:
+            if event == "start_map":
+                participant = {}
+            elif event == "end_map":
+                info["participants"].append(participant)
+                participant = None
+        elif participant is not None:
+            field = prefix[len(prefix_root) + 1 :]
+            if field in PARTICIPANT_FIELDS:
+                participant[field] = value
+        elif prefix in ("info.queueId", "info.gameDuration"):
+            info[prefix[5:]] = value
+    return {"info": info}
+
+
+def run(parse, chunk: list, rounds: int) -> tuple[float, float]:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        [parse(raw) for raw in chunk]
+    per_match_ms = (time.perf_counter() - started) / rounds / len(chunk) * 1000
+
+    tracemalloc.start()
+    kept = [parse(raw) for raw in chunk]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return per_match_ms, peak / 1024
+
+
+def main():
+    chunk_size = int(sys.argv[1]) if len(sys.argv) > 1 else 25
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    raw = make_payload()
+    chunk = [raw.encode()] * chunk_size
+    print(f"{chunk_size} payloads of {len(raw) / 1024:.1f} KiB, {rounds} rounds")
+
+    candidates = [("full", parse_full), ("slim", parse_match_payload)]
+    try:
+        import ijson  # noqa: F401
+
+        candidates.append(("ijson", parse_ijson))
+    except ImportError:
+        print("ijson not installed, skipping streaming parser")
+
+    for name, parse in candidates:
+        per_match_ms, peak_kib = run(parse, chunk, rounds)
+        print(f"{name:6s} {per_match_ms:7.3f} ms/match   chunk peak {peak_kib:9.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,28 @@
 import json
 import os
+import time
 import pymysql
 import logging
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Tuple, Set
+from db import get_connection, release_connection
+from budget import TimeBudget
+from match_queue import PROCESS_STAGE, claim_matches, count_stage
+from handoff import messages_from_event
+from polling import reschedule
+from match_store import get_store
+from payload import parse_match_payload
 
-connection = None
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-GET_MATCH_IDS_SQL = """
-    SELECT match_id, match_data
+CHUNK_SIZE = int(os.environ.get("PROCESS_MATCH_CHUNK_SIZE", 25))
+STORE_READ_WORKERS = int(os.environ.get("MATCH_STORE_READ_WORKERS", 8))
+
+GET_MATCH_DATA_KEYS_SQL_TMPL = """
+    SELECT match_id, match_data_key
     FROM match_history
-    WHERE match_data IS NOT NULL AND was_processed = 'false'
-    LIMIT 5;
+    WHERE match_id IN ({inlist});
 """
 
 FETCH_KNOWN_PUUIDS_SQL_TMPL = """
@@ -22,10 +31,12 @@ FETCH_KNOWN_PUUIDS_SQL_TMPL = """
     WHERE account_puuid IN ({inlist});
 """
 
-MARK_MATCH_PROCESSED_SQL = """
+MARK_MATCHES_PROCESSED_SQL_TMPL = """
     UPDATE match_history
-    SET was_processed = 'true'
-    WHERE match_id = %s;
+    SET was_processed = 'true',
+        lease_owner = NULL,
+        lease_expires_at = NULL
+    WHERE match_id IN ({inlist});
 """
 
 UPSERT_PROCESSED_MATCH_DATA_SQL = """
@@ -55,42 +66,42 @@ UPSERT_PROCESSED_MATCH_DATA_SQL = """
 """
 
 
-def get_connection() -> pymysql.Connection:
-    global connection
-    if connection is None:
-        connection = pymysql.connect(
-            host=os.environ["DB_HOST"],
-            port=int(os.environ["DB_PORT"]),
-            user=os.environ["DB_USER"],
-            password=os.environ["DB_PASSWORD"],
-            database=os.environ["DB_NAME"],
-            cursorclass=pymysql.cursors.DictCursor,
-        )
-    return connection
-
-
-def close_connection():
-    connection = get_connection()
-    if connection:
-        connection.close()
-    connection = None
+def fetch_unprocessed_matches(
+    conn: pymysql.Connection, worker_id: str, match_ids: List[str] | None = None
+) -> List[Dict[str, Any]]:
+    match_ids = claim_matches(conn, PROCESS_STAGE, worker_id, CHUNK_SIZE, match_ids)
+    if not match_ids:
+        return []
+    placeholders = ",".join(["%s"] * len(match_ids))
+    with conn.cursor() as cur:
+        cur.execute(GET_MATCH_DATA_KEYS_SQL_TMPL.format(inlist=placeholders), match_ids)
+        rows = cur.fetchall()
+    return load_match_data(rows)
 
 
-def ensure_json(data):
-    if data is None:
-        return None
-    if isinstance(data, (dict, list)):
-        return data
+def read_match_data(key: str):
     try:
-        return json.loads(data)
-    except Exception:
+        return get_store().get(key)
+    except Exception as e:
+        logger.error(f"Error reading {key} from the match store: {str(e)}")
         return None
 
 
-def fetch_unprocessed_matches(conn: pymysql.Connection) -> List[Dict[str, Any]]:
-    with conn.cursor() as cur:
-        cur.execute(GET_MATCH_IDS_SQL)
-        return cur.fetchall()
+def load_match_data(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Read the chunk's payloads from the match store in parallel. A payload
+    that can't be read is left out; its lease runs out and a later run
+    retries it.
+    """
+    keys = [row["match_data_key"] for row in rows]
+    with ThreadPoolExecutor(max_workers=STORE_READ_WORKERS) as pool:
+        payloads = list(pool.map(read_match_data, keys))
+
+    return [
+        {"match_id": row["match_id"], "match_data": payload}
+        for row, payload in zip(rows, payloads)
+        if payload is not None
+    ]
 
 
 def get_known_puuids(conn: pymysql.Connection, candidate_puuids: List[str]) -> Set[str]:
@@ -111,9 +122,14 @@ def insert_participant_rows(conn: pymysql.Connection, rows: List[Tuple]):
         cur.executemany(UPSERT_PROCESSED_MATCH_DATA_SQL, rows)
 
 
-def mark_match_processed(conn: pymysql.Connection, match_id: str):
+def mark_matches_processed(conn: pymysql.Connection, match_ids: List[str]):
+    if not match_ids:
+        return
+    placeholders = ",".join(["%s"] * len(match_ids))
     with conn.cursor() as cur:
-        cur.execute(MARK_MATCH_PROCESSED_SQL, (match_id,))
+        cur.execute(
+            MARK_MATCHES_PROCESSED_SQL_TMPL.format(inlist=placeholders), match_ids
+        )
 
 
 def extract_rows_for_known_puuids(
@@ -122,7 +138,7 @@ def extract_rows_for_known_puuids(
     info = (payload or {}).get("info", {})
     queue_id = info.get("queueId")
     game_duration = info.get("gameDuration")
-    if game_duration < 60 * 10:
+    if game_duration is None or game_duration < 60 * 10:
         return []  # skip remade games
     participants = info.get("participants", []) or []
 
@@ -185,58 +201,160 @@ def extract_rows_for_known_puuids(
     return rows
 
 
+def process_matches(
+    connection: pymysql.Connection, matches: List[Dict[str, Any]]
+) -> Tuple[int, int]:
+    """
+    Process a whole chunk with a fixed number of round-trips: one lookup for
+    every participant PUUID in the chunk, one executemany for all participant
+    rows and one update marking every match processed.
+    """
+    payloads: Dict[str, Dict[str, Any]] = {}
+    candidate_puuids: Set[str] = set()
+
+    for rec in matches:
+        match_id = rec["match_id"]
+        payload = parse_match_payload(rec["match_data"])
+        rec["match_data"] = None  # let the raw string go as soon as it is parsed
+        if not payload:
+            # still marked processed below, to prevent an infinite loop on a bad row
+            logger.warning(f"Skipping match {match_id}: invalid JSON payload.")
+            continue
+
+        payloads[match_id] = payload
+        participants = (payload.get("info", {}) or {}).get("participants", []) or []
+        candidate_puuids.update(p.get("puuid") for p in participants if p.get("puuid"))
+
+    known = get_known_puuids(connection, list(candidate_puuids))
+
+    processed_matches = 0
+    rows: List[Tuple] = []
+    for match_id, payload in payloads.items():
+        match_rows = extract_rows_for_known_puuids(match_id, payload, known)
+        if not match_rows:
+            logger.info(
+                f"Match {match_id}: no rows for known PUUIDs; marking processed."
+            )
+            continue
+        rows += match_rows
+        processed_matches += 1
+
+    insert_participant_rows(connection, rows)
+    mark_matches_processed(connection, [rec["match_id"] for rec in matches])
+
+    return processed_matches, len(rows)
+
+
+def process_handed_off(
+    connection: pymysql.Connection,
+    worker_id: str,
+    match_ids: List[str],
+    budget: TimeBudget,
+) -> Tuple[int, int, List[str]]:
+    """
+    Process exactly the matches get-match-data just handed over, chunk by
+    chunk while the time budget allows. Returns the match IDs it didn't get
+    to, so their messages go back on the queue.
+    """
+    processed_matches = 0
+    inserted_rows = 0
+    start = 0
+
+    while start < len(match_ids) and budget.has_time():
+        with budget.chunk():
+            chunk = match_ids[start : start + CHUNK_SIZE]
+            matches = fetch_unprocessed_matches(connection, worker_id, chunk)
+            if matches:
+                chunk_processed, chunk_inserted = process_matches(connection, matches)
+                connection.commit()
+
+                processed_matches += chunk_processed
+                inserted_rows += chunk_inserted
+        start += CHUNK_SIZE
+
+    return processed_matches, inserted_rows, match_ids[start:]
+
+
+def batch_item_failures(
+    messages: Dict[str, List[str]], unfinished: Set[str]
+) -> Dict[str, Any]:
+    """
+    SQS partial batch response: every message with a match we didn't finish
+    is retried. Matches from it that did get processed are skipped by the
+    claim on the retry.
+    """
+    return {
+        "batchItemFailures": [
+            {"itemIdentifier": message_id}
+            for message_id, match_ids in messages.items()
+            if unfinished.intersection(match_ids)
+        ]
+    }
+
+
 def lambda_handler(event, context):
+    worker_id = context.aws_request_id
+    budget = TimeBudget(context)
     processed_matches = 0
     inserted_rows = 0
     connection = get_connection()
+    messages = messages_from_event(event)
+    handed_off = (
+        None if messages is None else list(dict.fromkeys(sum(messages.values(), [])))
+    )
+    started = time.perf_counter()
 
     try:
-        matches = fetch_unprocessed_matches(connection)
-        if not matches:
-            logger.info("No unprocessed matches found.")
-            return {
-                "statusCode": 200,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*",
-                },
-            }
+        if handed_off is not None:
+            # queue trigger: only the matches in the messages. Anything we
+            # can't claim is already done or being worked on elsewhere.
+            processed_matches, inserted_rows, unfinished = process_handed_off(
+                connection, worker_id, handed_off, budget
+            )
+            logger.info(
+                f"Processed {processed_matches}/{len(handed_off)} handed-off matches, "
+                f"{len(unfinished)} left for a retry."
+            )
+            return batch_item_failures(messages, set(unfinished))
+        else:
+            # scheduled sweep: keep draining until the time budget or the
+            # backlog runs out, committing each chunk so a later failure keeps
+            # earlier progress. A chunk that fails keeps its lease until it
+            # expires and is then picked up again by whichever worker runs next.
+            while budget.has_time():
+                with budget.chunk():
+                    matches = fetch_unprocessed_matches(connection, worker_id)
+                    if not matches:
+                        break
+
+                    chunk_processed, chunk_inserted = process_matches(
+                        connection, matches
+                    )
+                    connection.commit()
+
+                    processed_matches += chunk_processed
+                    inserted_rows += chunk_inserted
+
+            if not processed_matches:
+                logger.info("No unprocessed matches found.")
+
+        elapsed = time.perf_counter() - started
+        throughput = processed_matches / elapsed if elapsed else 0.0
+        logger.info(
+            f"Processed {processed_matches} matches in {elapsed:.2f}s "
+            f"({throughput:.1f} matches/s)."
+        )
 
-        for rec in matches:
-            match_id = rec["match_id"]
-            raw = rec["match_data"]
-            payload = ensure_json(raw)
-            if not payload:
-                logger.warning(f"Skipping match {match_id}: invalid JSON payload.")
-                mark_match_processed(
-                    connection, match_id
-                )  # prevent infinite loop on bad row
-                continue
-
-            participants = (payload.get("info", {}) or {}).get("participants", []) or []
-            candidate_puuids = [p.get("puuid") for p in participants if p.get("puuid")]
-
-            known = get_known_puuids(connection, candidate_puuids)
-            if not known:
-                logger.info(
-                    f"Match {match_id}: no known PUUIDs found; marking processed."
-                )
-                mark_match_processed(connection, match_id)
-                continue
-
-            rows = extract_rows_for_known_puuids(match_id, payload, known)
-            if rows:
-                insert_participant_rows(connection, rows)
-                inserted_rows += len(rows)
-
-            mark_match_processed(connection, match_id)
-            processed_matches += 1
-
-        connection.commit()
+        # only the scheduled sweep gets here and adapts its own schedule
+        backlog = count_stage(connection, PROCESS_STAGE)
+        next_run_minutes = reschedule(backlog)
 
     except Exception as e:
         connection.rollback()
         logger.exception("Error while processing matches.")
+        if handed_off is not None:
+            # retry the whole batch; committed chunks are skipped by the claim
+            return batch_item_failures(messages, set(handed_off))
         return {
             "statusCode": 500,
             "headers": {
@@ -244,12 +362,16 @@ def lambda_handler(event, context):
                 "Access-Control-Allow-Origin": "*",
             },
             "body": json.dumps(
-                {"message": "Error processing matches.", "error": str(e)}
+                {
+                    "message": "Error processing matches.",
+                    "error": str(e),
+                    "matches_processed": processed_matches,
+                }
             ),
         }
 
     finally:
-        close_connection()
+        release_connection(connection)
 
     return {
         "statusCode": 200,
@@ -262,6 +384,9 @@ def lambda_handler(event, context):
                 "message": "Processed matches successfully.",
                 "matches_processed": processed_matches,
                 "rows_upserted": inserted_rows,
+                "matches_per_second": round(throughput, 2),
+                "backlog": backlog,
+                "next_run_minutes": next_run_minutes,
             }
         ),
     }
@@ -0,0 +1,65 @@
+import json
+from typing import Any, Dict, Optional
+
+# Everything extract_rows_for_known_puuids reads from a participant. A raw
+# match-v5 participant carries ~150 fields plus the challenges/perks/missions
+# objects, none of which we keep.
+PARTICIPANT_FIELDS = (
+    "puuid",
+    "riotIdGameName",
+    "riotIdTagline",
+    "championName",
+    "teamPosition",
+    "goldEarned",
+    "totalDamageDealtToChampions",
+    "damageDealtToTurrets",
+    "totalDamageTaken",
+    "damageSelfMitigated",
+    "totalMinionsKilled",
+    "neutralMinionsKilled",
+    "kills",
+    "deaths",
+    "assists",
+    "visionScore",
+    "totalHealsOnTeammates",
+    "objectivesStolen",
+    "totalTimeCCDealt",
+    "win",
+)
+
+
+def parse_match_payload(raw) -> Optional[Dict[str, Any]]:
+    """
+    Parse a stored match payload and keep only the fields processing needs,
+    in the same {"info": {...}} shape as the Riot response. The full document
+    is dropped as soon as it has been projected, so a chunk of matches holds
+    a few KB per match instead of the whole payloads.
+
+    A streaming parser (ijson) was measured as well; on ~75 KB payloads it
+    was several times slower than the C json decoder and did not lower the
+    peak either, see benchmark.py.
+    """
+    if raw is None:
+        return None
+    if isinstance(raw, dict):
+        payload = raw
+    else:
+        try:
+            payload = json.loads(raw)
+        except Exception:
+            return None
+    if not isinstance(payload, dict):
+        return None
+
+    info = payload.get("info") or {}
+    participants = info.get("participants") or []
+    return {
+        "info": {
+            "queueId": info.get("queueId"),
+            "gameDuration": info.get("gameDuration"),
+            "participants": [
+                {field: p.get(field) for field in PARTICIPANT_FIELDS}
+                for p in participants
+            ],
+        }
+    }
@@ -1,18 +1,7 @@
 import json
-import os
-import pymysql
+from db import get_connection, release_connection
 
 
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor
-    )
-
 def lambda_handler(event, context):
     request_id = context.aws_request_id
     
@@ -20,7 +9,7 @@ def lambda_handler(event, context):
 
     connection = None
     try:
-        connection = create_connection()
+        connection = get_connection()
         with connection.cursor() as cursor:
             cursor.execute("SELECT * FROM pickems WHERE user_id = %s", pickems_id)
             result = cursor.fetchall()
@@ -55,4 +44,4 @@ def lambda_handler(event, context):
         }
     finally:
         if connection:
-            connection.close()
\ No newline at end of file
+            release_connection(connection)
\ No newline at end of file
@@ -1,7 +1,6 @@
 import json
-import os
-import pymysql
 import requests
+from db import get_connection, release_connection
 
 UPSERT_PICKEMS_SQL = """
     INSERT INTO pickems (id, pickem_id, user_id, value)
@@ -45,17 +44,6 @@ def upsert_pickem(id, pickem_id, user_id, value):
         return cursor.lastrowid
 
 
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor,
-    )
-
-
 def pickems_unlocked() -> bool:
     with connection.cursor() as cursor:
         cursor.execute(SELECT_CONFIG_SQL, ("pickem_unlocked"))
@@ -73,6 +61,16 @@ def figure_out_pickems_type(id: str):
     return row["type"] if row else None
 
 
+def category_resolved(id: str) -> bool:
+    # pickems/score applies answer corrections as deltas against the picks a
+    # category was scored with, so those picks must not change afterwards
+    with connection.cursor() as cursor:
+        cursor.execute(SELECT_CONFIG_SQL, ("pickem_categories"))
+    config = cursor.fetchone()
+    row = next((i for i in json.loads(config["value"]) if i["id"] == id), None)
+    return bool(row and (row.get("answers") or row.get("answer") is not None))
+
+
 def is_admin_user(user_id) -> bool:
     with connection.cursor() as cursor:
         cursor.execute(SELECT_USER_SQL, user_id)
@@ -135,7 +133,7 @@ def lambda_handler(event, context):
     global connection
     request_id = context.aws_request_id
     pickem_data = json.loads(event["body"])
-    connection = create_connection()
+    connection = get_connection()
 
     pickem_id = pickem_data.get("id")
     # stolen from nemi
@@ -167,6 +165,16 @@ def lambda_handler(event, context):
             "body": json.dumps(f"Invalid data please fix and try again."),
         }
 
+    if category_resolved(pickem_id):
+        return {
+            "statusCode": 409,
+            "headers": {
+                "Content-Type": "application/json",
+                "Access-Control-Allow-Origin": "*",
+            },
+            "body": json.dumps(f"This pickem has already been scored."),
+        }
+
     pickems_type = figure_out_pickems_type(pickem_id)
     user_id = get_user_id(user_token)
     valid = True
@@ -234,4 +242,4 @@ def lambda_handler(event, context):
 
     finally:
         if connection:
-            connection.close()
+            release_connection(connection)
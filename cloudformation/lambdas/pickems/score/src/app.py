@@ -0,0 +1,210 @@
+import json
+import logging
+import time
+import traceback
+from db import get_connection, release_connection
+from leaderboard import rebuild_ranks
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# A pickem_categories entry is resolved once it carries its correct answer(s):
+#   {"id": "...", "type": "PLAYER", "answers": ["12", "31"], "points": 2}
+# "answer" works for a single value; points defaults to 1 per correct pick.
+# pickems/put refuses picks in a resolved category, so the picks a category
+# was scored against never change and later runs only apply the difference.
+DEFAULT_POINTS = 1
+
+GET_CATEGORIES_SQL = "SELECT value FROM config WHERE name = 'pickem_categories'"
+
+GET_SCORED_CATEGORIES_SQL = (
+    "SELECT pickem_id, answers, points FROM pickems_scored_categories"
+)
+
+# Answers to score against, with the points a matching pick is worth. A real
+# table, so pickems.value is compared in the schema's own collation.
+CREATE_ANSWER_POINTS_SQL = """
+    CREATE TEMPORARY TABLE pickem_answer_points (
+        pickem_id VARCHAR(255) NOT NULL,
+        value VARCHAR(255) NOT NULL,
+        points INT NOT NULL,
+        KEY (pickem_id, value)
+    );
+"""
+DROP_ANSWER_POINTS_SQL = "DROP TEMPORARY TABLE IF EXISTS pickem_answer_points"
+INSERT_ANSWER_POINTS_SQL = """
+    INSERT INTO pickem_answer_points (pickem_id, value, points)
+    VALUES (%s, %s, %s)
+"""
+
+USER_POINTS_SQL = """
+    SELECT pk.user_id, SUM(a.points) AS points
+    FROM pickems pk
+    JOIN pickem_answer_points a
+        ON a.pickem_id = pk.pickem_id AND a.value = pk.value
+    GROUP BY pk.user_id
+"""
+
+SET_SCORES_SQL = f"""
+    UPDATE profiles p
+    LEFT JOIN ({USER_POINTS_SQL}) s ON s.user_id = p.id
+    SET p.pickems_score = COALESCE(s.points, 0);
+"""
+
+ADD_SCORES_SQL = f"""
+    UPDATE profiles p
+    JOIN ({USER_POINTS_SQL}) s ON s.user_id = p.id
+    SET p.pickems_score = p.pickems_score + s.points;
+"""
+
+DELETE_SCORED_SQL_TMPL = """
+    DELETE FROM pickems_scored_categories WHERE pickem_id IN ({inlist});
+"""
+DELETE_ALL_SCORED_SQL = "DELETE FROM pickems_scored_categories"
+INSERT_SCORED_SQL = """
+    INSERT INTO pickems_scored_categories (pickem_id, answers, points)
+    VALUES (%s, %s, %s)
+"""
+
+
+def resolved_categories(raw: str | None) -> dict:
+    """pickem_id -> (sorted answers, points) for every resolved category."""
+    resolved = {}
+    for category in json.loads(raw or "[]"):
+        answers = category.get("answers")
+        if answers is None and category.get("answer") is not None:
+            answers = [category["answer"]]
+        if not answers:
+            continue
+        points = int(category.get("points", DEFAULT_POINTS))
+        resolved[str(category["id"])] = (
+            tuple(sorted({str(answer) for answer in answers})),
+            points,
+        )
+    return resolved
+
+
+def load_state(connection) -> tuple[dict, dict]:
+    with connection.cursor() as cursor:
+        cursor.execute(GET_CATEGORIES_SQL)
+        config = cursor.fetchone()
+        cursor.execute(GET_SCORED_CATEGORIES_SQL)
+        scored = {
+            row["pickem_id"]: (tuple(json.loads(row["answers"])), row["points"])
+            for row in cursor.fetchall()
+        }
+    return resolved_categories(config["value"] if config else None), scored
+
+
+def answer_points(categories: dict, sign: int = 1) -> list[tuple]:
+    return [
+        (pickem_id, answer, sign * points)
+        for pickem_id, (answers, points) in categories.items()
+        for answer in answers
+    ]
+
+
+def score(cursor, rows: list[tuple], full: bool) -> int:
+    """
+    Apply `rows` of (pickem_id, answer, points) to every user in one
+    set-based UPDATE: replacing every score when `full`, otherwise adding
+    each user's total to what they already have. Returns the rows changed.
+    """
+    cursor.execute(DROP_ANSWER_POINTS_SQL)
+    cursor.execute(CREATE_ANSWER_POINTS_SQL)
+    try:
+        if rows:
+            cursor.executemany(INSERT_ANSWER_POINTS_SQL, rows)
+        cursor.execute(SET_SCORES_SQL if full else ADD_SCORES_SQL)
+        return cursor.rowcount
+    finally:
+        cursor.execute(DROP_ANSWER_POINTS_SQL)
+
+
+def save_scored(cursor, resolved: dict, changed: set, full: bool) -> None:
+    if full:
+        cursor.execute(DELETE_ALL_SCORED_SQL)
+    else:
+        inlist = ",".join(["%s"] * len(changed))
+        cursor.execute(DELETE_SCORED_SQL_TMPL.format(inlist=inlist), list(changed))
+
+    rows = [
+        (pickem_id, json.dumps(list(answers)), points)
+        for pickem_id, (answers, points) in resolved.items()
+        if full or pickem_id in changed
+    ]
+    if rows:
+        cursor.executemany(INSERT_SCORED_SQL, rows)
+
+
+def lambda_handler(event, context):
+    started = time.perf_counter()
+    # {"full": true} rescores everyone from scratch, e.g. after editing picks
+    # by hand once their category was resolved
+    full = bool((event or {}).get("full"))
+    connection = get_connection()
+
+    try:
+        resolved, scored = load_state(connection)
+        changed = {
+            pickem_id
+            for pickem_id in resolved.keys() | scored.keys()
+            if resolved.get(pickem_id) != scored.get(pickem_id)
+        }
+        # the first scoring run also clears any scores set by hand
+        full = full or (not scored and bool(changed))
+
+        updated = 0
+        with connection.cursor() as cursor:
+            if full or changed:
+                if full:
+                    rows = answer_points(resolved)
+                else:
+                    # take back what each changed category gave under its old
+                    # answers and award it again under the new ones
+                    rows = answer_points(
+                        {k: v for k, v in scored.items() if k in changed}, sign=-1
+                    ) + answer_points(
+                        {k: v for k, v in resolved.items() if k in changed}
+                    )
+                updated = score(cursor, rows, full)
+                save_scored(cursor, resolved, changed, full)
+            # also picks up profiles created or deleted since the last run
+            rebuild_ranks(cursor, "pickems")
+        connection.commit()
+
+    except Exception as e:
+        connection.rollback()
+        logger.error(traceback.format_exc())
+        logger.error(f"Error scoring pickems: {str(e)}")
+        return {
+            "statusCode": 500,
+            "headers": {
+                "Content-Type": "application/json",
+                "Access-Control-Allow-Origin": "*",
+            },
+            "body": json.dumps({"message": f"Failed to score pickems: {e}"}),
+        }
+    finally:
+        release_connection(connection)
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"Scored {len(changed)} changed categories ({'full' if full else 'incremental'}), "
+        f"{updated} profiles updated in {elapsed:.2f}s"
+    )
+
+    return {
+        "statusCode": 201,
+        "headers": {
+            "Content-Type": "application/json",
+            "Access-Control-Allow-Origin": "*",
+        },
+        "body": json.dumps(
+            {
+                "full": full,
+                "categories_rescored": sorted(changed),
+                "profiles_updated": updated,
+            }
+        ),
+    }
@@ -2,8 +2,8 @@ import base64
 import json
 import os
 import boto3
-import pymysql
 from datetime import datetime
+from db import get_connection, release_connection
 
 s3 = boto3.client("s3")
 
@@ -23,16 +23,6 @@ def validate_player_data(player_data) -> bool:
 
     return True
 
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor
-    )
-
 def generate_image_upload_url(location, max_size_mb = 5) -> str | None:
     max_size_bytes = max_size_mb * 1024 * 1024
     timestamp = datetime.now().timestamp()
@@ -75,7 +65,7 @@ def lambda_handler(event, context):
     connection = None
 
     try:
-        connection = create_connection()
+        connection = get_connection()
 
         [avatar_url, avatar_upload_presigned_data] = generate_image_upload_url("avatars", 10)
 
@@ -112,4 +102,4 @@ def lambda_handler(event, context):
 
     finally:
         if connection:
-            connection.close()
+            release_connection(connection)
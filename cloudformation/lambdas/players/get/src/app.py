@@ -1,6 +1,5 @@
-import pymysql
-import os
 import json
+from db import get_connection, release_connection
 
 SELECT_PLAYERS_SQL = """
     SELECT
@@ -14,26 +13,15 @@ SELECT_PLAYERS_SQL = """
 """
 
 
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor,
-    )
-
-
 def lambda_handler(event, context):
-    conn = create_connection()
-
-    with conn.cursor() as cur:
-        cur.execute(SELECT_PLAYERS_SQL)
-        rows = cur.fetchall()
-
-    if conn:
-        conn.close()
+    conn = get_connection()
+
+    try:
+        with conn.cursor() as cur:
+            cur.execute(SELECT_PLAYERS_SQL)
+            rows = cur.fetchall()
+    finally:
+        release_connection(conn)
 
     return {
         "statusCode": 200,
@@ -4,6 +4,7 @@ import os
 import boto3
 import pymysql
 from datetime import datetime
+from db import get_connection, release_connection
 
 s3 = boto3.client("s3")
 
@@ -38,16 +39,6 @@ def validate_player_data(player_data) -> bool:
 
     return True
 
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor
-    )
-
 def generate_image_upload_url(location, max_size_mb = 5) -> str | None:
     max_size_bytes = max_size_mb * 1024 * 1024
     timestamp = datetime.now().timestamp()
@@ -115,7 +106,7 @@ def lambda_handler(event, context):
     connection = None
 
     try:   
-        connection = create_connection()
+        connection = get_connection()
 
         upload_data = {}
 
@@ -213,4 +204,4 @@ def lambda_handler(event, context):
 
     finally:
         if connection:
-            connection.close()
+            release_connection(connection)
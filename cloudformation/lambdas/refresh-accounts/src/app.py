@@ -0,0 +1,229 @@
+import json
+import os
+import logging
+import time
+import traceback
+from db import get_connection, release_connection, not_in
+from budget import TimeBudget
+from refresh import fetch_all, mark_fetched
+from polling import reschedule
+
+import champion_mastery
+import league_entries
+import match_history
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Every per-account refresh, keyed by name. Each module has the
+# riot_accounts COLUMN stamped on refresh, fetch(account) and
+# save(cursor, results_by_puuid).
+REFRESHERS = {
+    "match_history": match_history,
+    "league_entries": league_entries,
+    "champion_mastery": champion_mastery,
+}
+
+CHUNK_SIZE = int(os.environ.get("REFRESH_CHUNK_SIZE", 20))
+FETCH_WORKERS = int(os.environ.get("REFRESH_FETCH_WORKERS", 8))
+STALE_AFTER_HOURS = int(os.environ.get("REFRESH_STALE_AFTER_HOURS", 24))
+# Players with a tournament match coming up are refreshed first and go
+# stale sooner, so their data is fresh when the game is played.
+UPCOMING_WINDOW_HOURS = int(os.environ.get("REFRESH_UPCOMING_WINDOW_HOURS", 48))
+UPCOMING_STALE_AFTER_HOURS = int(
+    os.environ.get("REFRESH_UPCOMING_STALE_AFTER_HOURS", 2)
+)
+
+UPCOMING_PLAYERS_SQL = """
+    SELECT DISTINCT p.id AS player_id
+    FROM players p
+    JOIN tournament_matches tm ON p.team_id IN (tm.team_1_id, tm.team_2_id)
+    WHERE tm.start_date BETWEEN NOW() AND NOW() + INTERVAL %s HOUR
+"""
+
+STALE_ACCOUNTS_FROM_SQL = """
+    FROM riot_accounts ra
+    LEFT JOIN ({upcoming}) upcoming ON upcoming.player_id = ra.player_id
+    WHERE (ra.{column} IS NULL
+        OR ra.{column} < NOW() - INTERVAL %s HOUR)
+        AND (ra.{column} IS NULL
+        OR ra.{column} < NOW() - INTERVAL
+            IF(upcoming.player_id IS NULL, %s, %s) HOUR)
+"""
+
+GET_STALE_ACCOUNTS_SQL = """
+    SELECT ra.account_puuid,
+        ra.match_history_watermark,
+        ra.{column} AS last_fetch,
+        upcoming.player_id IS NOT NULL AS boosted
+    {stale_from}
+        {exclude}
+    ORDER BY boosted DESC, ra.{column} IS NOT NULL, ra.{column} ASC
+    LIMIT %s;
+"""
+
+COUNT_STALE_ACCOUNTS_SQL = """
+    SELECT COUNT(*) AS stale,
+        COALESCE(SUM(upcoming.player_id IS NOT NULL), 0) AS boosted
+    {stale_from};
+"""
+
+
+def stale_from(column: str) -> str:
+    return STALE_ACCOUNTS_FROM_SQL.format(upcoming=UPCOMING_PLAYERS_SQL, column=column)
+
+
+def stale_params() -> tuple:
+    # The first bound is the loosest of the two and doesn't depend on the
+    # join, so it can be served from the last_*_fetch index; the second is
+    # the exact per-account cutoff.
+    return (
+        UPCOMING_WINDOW_HOURS,
+        min(STALE_AFTER_HOURS, UPCOMING_STALE_AFTER_HOURS),
+        STALE_AFTER_HOURS,
+        UPCOMING_STALE_AFTER_HOURS,
+    )
+
+
+def fetch_stale_accounts(connection, name: str, exclude=()) -> list:
+    column = REFRESHERS[name].COLUMN
+    exclude_sql, exclude_params = not_in("ra.account_puuid", exclude)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            GET_STALE_ACCOUNTS_SQL.format(
+                column=column, stale_from=stale_from(column), exclude=exclude_sql
+            ),
+            (*stale_params(), *exclude_params, CHUNK_SIZE),
+        )
+        return cursor.fetchall()
+
+
+def count_queue_depths(connection) -> dict:
+    depths = {}
+    with connection.cursor() as cursor:
+        for name, refresher in REFRESHERS.items():
+            cursor.execute(
+                COUNT_STALE_ACCOUNTS_SQL.format(
+                    stale_from=stale_from(refresher.COLUMN)
+                ),
+                stale_params(),
+            )
+            row = cursor.fetchone()
+            depths[name] = {"stale": int(row["stale"]), "boosted": int(row["boosted"])}
+    return depths
+
+
+def pick_work(connection, seen: dict) -> dict:
+    """
+    The next CHUNK_SIZE (refresh, puuid) pairs across every refresh type:
+    boosted accounts first, then never-fetched, then the longest stale.
+    """
+    candidates = []
+    for name in REFRESHERS:
+        for account in fetch_stale_accounts(connection, name, exclude=seen[name]):
+            candidates.append((name, account))
+
+    def urgency(candidate):
+        _, account = candidate
+        last_fetch = account["last_fetch"]
+        return (not account["boosted"], last_fetch is not None, last_fetch or 0)
+
+    candidates.sort(key=urgency)
+    return {
+        (name, account["account_puuid"]): account
+        for name, account in candidates[:CHUNK_SIZE]
+    }
+
+
+def save_results(connection, results: dict, rejected: dict) -> None:
+    """Write every refresh type's results for the run in one transaction."""
+    try:
+        with connection.cursor() as cursor:
+            for name, refresher in REFRESHERS.items():
+                if results[name]:
+                    refresher.save(cursor, results[name])
+                # Riot rejected these outright; stamp them so they wait a full
+                # stale interval instead of being retried every run
+                mark_fetched(cursor, refresher.COLUMN, rejected[name])
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+
+
+def lambda_handler(event, context):
+    budget = TimeBudget(context)
+    started = time.perf_counter()
+    seen = {name: set() for name in REFRESHERS}
+    results = {name: {} for name in REFRESHERS}
+    rejected = {name: [] for name in REFRESHERS}
+    rate_limited = False
+    connection = get_connection()
+
+    try:
+        # keep picking the most urgent work until the time budget or the
+        # backlog runs out. Every refresh type draws on the same Riot client,
+        # so they share one rate budget.
+        while budget.has_time() and not rate_limited:
+            with budget.chunk():
+                work = pick_work(connection, seen)
+                if not work:
+                    break
+                for name, puuid in work:
+                    seen[name].add(puuid)
+
+                chunk_results, chunk_rejected, rate_limited = fetch_all(
+                    lambda key: REFRESHERS[key[0]].fetch(work[key]),
+                    list(work),
+                    FETCH_WORKERS,
+                )
+                for (name, puuid), result in chunk_results.items():
+                    results[name][puuid] = result
+                for name, puuid in chunk_rejected:
+                    rejected[name].append(puuid)
+
+        save_results(connection, results, rejected)
+        queue_depths = count_queue_depths(connection)
+        next_run_minutes = reschedule(
+            sum(depth["stale"] for depth in queue_depths.values())
+        )
+
+    except Exception as e:
+        logger.error(traceback.format_exc())
+        logger.error(f"Error refreshing accounts: {str(e)}")
+        return {
+            "statusCode": 500,
+            "headers": {
+                "Content-Type": "application/json",
+                "Access-Control-Allow-Origin": "*",
+            },
+            "body": json.dumps({"message": f"Failed to refresh accounts: {e}"}),
+        }
+    finally:
+        release_connection(connection)
+
+    refreshed = {name: len(results[name]) for name in REFRESHERS}
+    elapsed = time.perf_counter() - started
+    accounts_per_second = sum(refreshed.values()) / elapsed if elapsed else 0.0
+    logger.info(
+        f"Refreshed {refreshed} in {elapsed:.2f}s "
+        f"({accounts_per_second:.1f} accounts/s). Queue depths: {queue_depths}"
+    )
+
+    return {
+        "statusCode": 201,
+        "headers": {
+            "Content-Type": "application/json",
+            "Access-Control-Allow-Origin": "*",
+        },
+        "body": json.dumps(
+            {
+                "refreshed": refreshed,
+                "rejected": {name: len(rejected[name]) for name in REFRESHERS},
+                "rate_limited": rate_limited,
+                "accounts_per_second": round(accounts_per_second, 2),
+                "queue_depths": queue_depths,
+                "next_run_minutes": next_run_minutes,
+            }
+        ),
+    }
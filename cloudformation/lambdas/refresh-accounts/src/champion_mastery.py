@@ -0,0 +1,34 @@
+import json
+import logging
+
+from riot import get_client
+from refresh import mark_fetched
+
+RIOT_PLATFORM = "euw1"
+MASTERY_ROUTE = "/lol/champion-mastery/v4/champion-masteries/by-puuid/{puuid}"
+COLUMN = "last_champion_mastery_fetch"
+
+INSERT_OR_UPDATE_MASTERY_SQL = """
+    INSERT INTO account_champion_mastery (
+        account_puuid,
+        mastery_json
+    ) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE
+        mastery_json = VALUES(mastery_json);
+"""
+
+logger = logging.getLogger()
+
+
+def fetch(account: dict) -> list[dict]:
+    puuid = account["account_puuid"]
+    logger.info(f"Fetching champion mastery for puuid={puuid}")
+    resp = get_client().get(RIOT_PLATFORM, MASTERY_ROUTE, puuid=puuid)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def save(cursor, results: dict) -> None:
+    rows = [(puuid, json.dumps(mastery)) for puuid, mastery in results.items()]
+    cursor.executemany(INSERT_OR_UPDATE_MASTERY_SQL, rows)
+    mark_fetched(cursor, COLUMN, list(results))
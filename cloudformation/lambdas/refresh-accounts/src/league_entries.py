@@ -0,0 +1,29 @@
+import json
+
+from riot import get_client
+from refresh import mark_fetched
+
+RIOT_PLATFORM = "euw1"
+LEAGUE_ENTRIES_ROUTE = "/lol/league/v4/entries/by-puuid/{puuid}"
+COLUMN = "last_player_stats_fetch"
+
+UPSERT_PLAYER_STATS_SQL = """
+    INSERT INTO player_stats (puuid, league_entries)
+    VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE
+        league_entries = VALUES(league_entries);
+"""
+
+
+def fetch(account: dict):
+    response = get_client().get(
+        RIOT_PLATFORM, LEAGUE_ENTRIES_ROUTE, puuid=account["account_puuid"]
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def save(cursor, results: dict) -> None:
+    rows = [(puuid, json.dumps(entries)) for puuid, entries in results.items()]
+    cursor.executemany(UPSERT_PLAYER_STATS_SQL, rows)
+    mark_fetched(cursor, COLUMN, list(results))
@@ -0,0 +1,100 @@
+import datetime
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from riot import get_client
+
+logger = logging.getLogger()
+
+REGION = "europe"
+MATCH_IDS_ROUTE = "/lol/match/v5/matches/by-puuid/{puuid}/ids"
+COLUMN = "last_match_history_fetch"
+# IDs asked for per request (Riot's maximum). Queues are paged with `start`
+# until a page comes back short, so no game in the window is ever dropped.
+PAGE_SIZE = 100
+QUEUE_IDS = (420, 440, 400)  # Ranked Solo/Duo, Ranked Flex, Normal Draft
+# How far back an account with no watermark yet is searched
+INITIAL_LOOKBACK = datetime.timedelta(weeks=2)
+# startTime filters on game start, so a game still running when we fetch only
+# shows up later with an earlier start time. Re-scan this much behind the
+# watermark; INSERT IGNORE drops the overlap.
+WATERMARK_OVERLAP = datetime.timedelta(hours=1)
+
+INSERT_MATCH_HISTORY_SQL = """
+    INSERT IGNORE INTO match_history (match_id)
+    VALUES (%s)
+"""
+UPDATE_LAST_MATCH_HISTORY_FETCH_SQL_TMPL = """
+UPDATE riot_accounts
+SET last_match_history_fetch = NOW(),
+    match_history_watermark = CASE account_puuid {cases} END
+WHERE account_puuid IN ({inlist})
+"""
+
+
+def fetch_queue_type(puuid, queue_id, start_time: int) -> list:
+    match_ids = []
+    while True:
+        params = {
+            "startTime": start_time,
+            "queue": queue_id,
+            "start": len(match_ids),
+            "count": PAGE_SIZE,
+        }
+        response = get_client().get(REGION, MATCH_IDS_ROUTE, params=params, puuid=puuid)
+        response.raise_for_status()
+        page = response.json()
+        match_ids += page
+        if len(page) < PAGE_SIZE:
+            return match_ids
+
+
+def fetch(account: dict) -> tuple[list, int]:
+    """
+    Every match ID in the window for one account across every queue, and
+    the watermark to store once they are saved. The queues are fetched side
+    by side; the shared Riot client keeps them inside the rate budget.
+    Raises if any queue or page fails, so the watermark never skips a window.
+    """
+    started = datetime.datetime.now()
+    start_time = account["match_history_watermark"] or int(
+        (started - INITIAL_LOOKBACK).timestamp()
+    )
+
+    with ThreadPoolExecutor(max_workers=len(QUEUE_IDS)) as pool:
+        pages = pool.map(
+            lambda queue_id: fetch_queue_type(
+                account["account_puuid"], queue_id, start_time
+            ),
+            QUEUE_IDS,
+        )
+        # pages of one queue can overlap if new games arrive while paging
+        match_ids = list(dict.fromkeys(m for page in pages for m in page))
+
+    watermark = max(start_time, int((started - WATERMARK_OVERLAP).timestamp()))
+    return match_ids, watermark
+
+
+def save(cursor, results: dict) -> None:
+    """
+    Insert every new ID with one multi-row INSERT IGNORE and move all
+    watermarks forward with one UPDATE. The caller commits both together,
+    so a watermark never gets ahead of the IDs it covers.
+    """
+    match_ids = {match_id for ids, _ in results.values() for match_id in ids}
+    if match_ids:
+        cursor.executemany(
+            INSERT_MATCH_HISTORY_SQL, [(match_id,) for match_id in match_ids]
+        )
+
+    cases = " ".join(["WHEN %s THEN %s"] * len(results))
+    inlist = ",".join(["%s"] * len(results))
+    params = []
+    for puuid, (_, watermark) in results.items():
+        params += [puuid, watermark]
+    params += list(results)
+    cursor.execute(
+        UPDATE_LAST_MATCH_HISTORY_FETCH_SQL_TMPL.format(cases=cases, inlist=inlist),
+        params,
+    )
+    logger.info(f"Saved {len(match_ids)} match IDs for {len(results)} accounts.")
@@ -1,7 +1,7 @@
 import json
-import os
 import re
 import pymysql
+from db import get_connection, release_connection
 
 ROUTES = {
     # Route config (resource -> table/columns/pk)
@@ -83,17 +83,6 @@ def _response(status: int, body) -> dict:
     }
 
 
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor,
-    )
-
-
 def lambda_handler(event, context):
     request_id = getattr(context, "aws_request_id", "no-request-id")
 
@@ -106,14 +95,17 @@ def lambda_handler(event, context):
         )
 
         if resource == "settings":
-            conn = create_connection()
-
-            with conn.cursor() as cur:
-                list_sql = "SELECT * FROM config WHERE public = 1"
-                cur.execute(list_sql)
-                rows = cur.fetchall()
-                formatted_rows = {row["name"]: row["value"] for row in rows}
-                return _response(200, formatted_rows)
+            conn = get_connection()
+
+            try:
+                with conn.cursor() as cur:
+                    list_sql = "SELECT * FROM config WHERE public = 1"
+                    cur.execute(list_sql)
+                    rows = cur.fetchall()
+                    formatted_rows = {row["name"]: row["value"] for row in rows}
+                    return _response(200, formatted_rows)
+            finally:
+                release_connection(conn)
 
         # Validate resource
         if resource not in ROUTES:
@@ -133,7 +125,7 @@ def lambda_handler(event, context):
         conn = None
         try:
             print(f"{request_id} Connecting to DB")
-            conn = create_connection()
+            conn = get_connection()
             print(f"{request_id} DB connected")
 
             with conn.cursor() as cur:
@@ -193,8 +185,8 @@ def lambda_handler(event, context):
 
         finally:
             if conn:
-                conn.close()
-                print(f"{request_id} DB connection closed")
+                release_connection(conn)
+                print(f"{request_id} DB connection released")
 
     except pymysql.err.OperationalError as e:
         print(f"{request_id} DB connection error: {str(e)}")
@@ -1,7 +1,6 @@
 import json
-import os
-import pymysql
-import requests
+from db import get_connection, release_connection
+from riot import get_client
 
 INSERT_ACCOUNT_SQL = """
     INSERT INTO riot_accounts (account_name, account_puuid, player_id, is_primary)
@@ -10,17 +9,13 @@ INSERT_ACCOUNT_SQL = """
 
 
 def get_player_puuid(summoner_name: str, region: str = "europe") -> str:
-    api_key = os.environ["RIOT_API_KEY"]
-
     if "#" not in summoner_name:
         raise ValueError("Summoner name must include tag (e.g., 'Player#EUW1').")
 
     name, tag = summoner_name.split("#", 1)
-    url = f"https://{region}.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{name}/{tag}"
-
-    headers = {"X-Riot-Token": api_key}
-
-    response = requests.get(url, headers=headers)
+    response = get_client().get(
+        region, "/riot/account/v1/accounts/by-riot-id/{name}/{tag}", name=name, tag=tag
+    )
 
     if response.status_code == 200:
         puuid = response.json().get("puuid")
@@ -47,17 +42,6 @@ def validate_account_data(account_data) -> bool:
     return True
 
 
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor,
-    )
-
-
 def lambda_handler(event, context):
     request_id = context.aws_request_id
     account_data = json.loads(event["body"])
@@ -91,7 +75,7 @@ def lambda_handler(event, context):
     connection = None
 
     try:
-        connection = create_connection()
+        connection = get_connection()
 
         with connection.cursor() as cursor:
             cursor.execute(
@@ -128,4 +112,4 @@ def lambda_handler(event, context):
 
     finally:
         if connection:
-            connection.close()
+            release_connection(connection)
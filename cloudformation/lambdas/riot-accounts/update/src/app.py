@@ -1,6 +1,5 @@
 import json
-import os
-import pymysql
+from db import get_connection, release_connection
 
 UPDATE_ACCOUNT_SQL = """
     UPDATE riot_accounts SET is_primary = %s WHERE id = %s
@@ -19,17 +18,6 @@ def validate_account_data(account_data) -> bool:
     return True
 
 
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor,
-    )
-
-
 def lambda_handler(event, context):
     request_id = context.aws_request_id
     account_data = json.loads(event["body"])
@@ -49,7 +37,7 @@ def lambda_handler(event, context):
     connection = None
 
     try:
-        connection = create_connection()
+        connection = get_connection()
 
         with connection.cursor() as cursor:
             cursor.execute(
@@ -78,4 +66,4 @@ def lambda_handler(event, context):
 
     finally:
         if connection:
-            connection.close()
+            release_connection(connection)
@@ -1,17 +1,5 @@
 import json
-import os
-import pymysql
-
-
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor,
-    )
+from db import get_connection, release_connection
 
 
 def response(status_code, body):
@@ -52,7 +40,7 @@ def lambda_handler(event, context):
 
     connection = None
     try:
-        connection = create_connection()
+        connection = get_connection()
         with connection.cursor() as cursor:
             cursor.execute(GET_SCHEDULE_SQL)
             row = cursor.fetchall()
@@ -69,4 +57,4 @@ def lambda_handler(event, context):
 
     finally:
         if connection:
-            connection.close()
+            release_connection(connection)
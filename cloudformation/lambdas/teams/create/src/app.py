@@ -2,8 +2,8 @@ import base64
 import json
 import os
 import boto3
-import pymysql
 from datetime import datetime
+from db import get_connection, release_connection
 
 s3 = boto3.client("s3")
 
@@ -18,16 +18,6 @@ def validate_team_data(team_data) -> bool:
 
     return True
 
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor
-    )
-
 def generate_image_upload_url(location, max_size_mb = 5) -> str | None:
     max_size_bytes = max_size_mb * 1024 * 1024
     timestamp = datetime.now().timestamp()
@@ -67,7 +57,7 @@ def lambda_handler(event, context):
     connection = None
 
     try:
-        connection = create_connection()
+        connection = get_connection()
 
         [logo_url, logo_upload_presigned_data] = generate_image_upload_url("teams/logo", 15)
         [banner_url, banner_upload_presigned_data] = generate_image_upload_url("teams/banner", 50)
@@ -106,4 +96,4 @@ def lambda_handler(event, context):
 
     finally:
         if connection:
-            connection.close()
+            release_connection(connection)
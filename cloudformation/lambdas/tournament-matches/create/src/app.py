@@ -1,9 +1,8 @@
 import base64
 import json
-import os
 import boto3
-import pymysql
 from datetime import datetime
+from db import get_connection, release_connection
 
 INSERT_TOURNAMENT_MATCH_SQL = """
     INSERT INTO tournament_matches (team_1_id, team_2_id, start_date, map, pick_type, team_size)
@@ -25,17 +24,6 @@ def validate_match_data(match_data) -> bool:
     return True
 
 
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor,
-    )
-
-
 def lambda_handler(event, context):
     request_id = context.aws_request_id
 
@@ -72,7 +60,7 @@ def lambda_handler(event, context):
     connection = None
 
     try:
-        connection = create_connection()
+        connection = get_connection()
 
         with connection.cursor() as cursor:
             cursor.execute(
@@ -108,4 +96,4 @@ def lambda_handler(event, context):
 
     finally:
         if connection:
-            connection.close()
+            release_connection(connection)
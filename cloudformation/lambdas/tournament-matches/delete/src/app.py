@@ -1,6 +1,5 @@
 import json
-import os
-import pymysql
+from db import get_connection, release_connection
 
 DELETE_TOURNAMENT_MATCH_SQL = """
     DELETE FROM tournament_matches WHERE id = %s
@@ -14,16 +13,6 @@ def validate_match_data(match_data) -> bool:
 
     return True
 
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor,
-    )
-
 def lambda_handler(event, context):
     request_id = context.aws_request_id
     match_data = json.loads(event["body"])
@@ -42,7 +31,7 @@ def lambda_handler(event, context):
     connection = None
 
     try:
-        connection = create_connection()
+        connection = get_connection()
 
         with connection.cursor() as cursor:
             cursor.execute(
@@ -71,4 +60,4 @@ def lambda_handler(event, context):
 
     finally:
         if connection:
-            connection.close()
\ No newline at end of file
+            release_connection(connection)
\ No newline at end of file
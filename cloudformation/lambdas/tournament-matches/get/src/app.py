@@ -1,8 +1,7 @@
-import pymysql
 import json
-import os
 import traceback
 from datetime import datetime
+from db import get_connection, release_connection
 
 SELECT_MATCHES_SQL = """
 SELECT
@@ -17,17 +16,6 @@ LEFT JOIN teams t3 ON t3.id = m.winner_team_id
 """
 
 
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor,
-    )
-
-
 def response(status_code, body):
     return {
         "statusCode": status_code,
@@ -45,7 +33,7 @@ def format_date(dt: datetime):
 
 def lambda_handler(event, context):
     try:
-        connection = create_connection()
+        connection = get_connection()
 
         with connection.cursor() as cur:
             cur.execute(SELECT_MATCHES_SQL)
@@ -66,4 +54,4 @@ def lambda_handler(event, context):
         return response(500, {"error": f"{e}"})
     finally:
         if connection:
-            connection.close()
+            release_connection(connection)
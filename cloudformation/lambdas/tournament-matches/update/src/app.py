@@ -1,20 +1,8 @@
 import base64
 import json
-import os
 import boto3
-import pymysql
 from datetime import datetime
-
-
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor,
-    )
+from db import get_connection, release_connection
 
 
 def validate_match_data(match_data) -> bool:
@@ -54,7 +42,7 @@ def lambda_handler(event, context):
 
     connection = None
     try:
-        connection = create_connection()
+        connection = get_connection()
 
         with connection.cursor() as cursor:
             rows_affected = cursor.execute(
@@ -93,4 +81,4 @@ def lambda_handler(event, context):
         }
     finally:
         if connection:
-            connection.close()
+            release_connection(connection)
@@ -1,9 +1,8 @@
 import json
-import os
-import pymysql
 from datetime import datetime
-import requests
 import traceback
+from db import get_connection, release_connection
+from riot import get_client
 
 GET_WINNING_TEAM_SQL = """
 SELECT
@@ -29,17 +28,6 @@ INSERT_MATCH_HISTORY_SQL = """
 """
 
 
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor,
-    )
-
-
 def response(status_code, body):
     return {
         "statusCode": status_code,
@@ -55,12 +43,13 @@ def lambda_handler(event, context):
     body = json.loads(event["body"])
 
     try:
-        url = f"https://americas.api.riotgames.com/lol/tournament/v5/games/by-code/{body['shortCode']}"
-        headers = {"X-Riot-Token": os.environ["RIOT_API_KEY"]}
-
-        res = requests.get(url, headers=headers)
+        res = get_client().get(
+            "americas",
+            "/lol/tournament/v5/games/by-code/{code}",
+            code=body["shortCode"],
+        )
         games = res.json()
-        connection = create_connection()
+        connection = get_connection()
 
         for game in games:
             with connection.cursor() as cur:
@@ -97,4 +86,4 @@ def lambda_handler(event, context):
         )
     finally:
         if connection:
-            connection.close()
+            release_connection(connection)
@@ -1,8 +1,7 @@
 import json
-import os
-import pymysql
 import logging
-import requests
+from db import get_connection, release_connection
+from riot import get_client
 
 SELECT_MATCH_SQL = """
 SELECT * FROM tournament_matches WHERE id = %s
@@ -17,17 +16,6 @@ UPDATE tournament_matches SET lobby_code = %s WHERE id = %s
 """
 
 
-def create_connection() -> pymysql.Connection:
-    return pymysql.connect(
-        host=os.environ["DB_HOST"],
-        port=int(os.environ["DB_PORT"]),
-        user=os.environ["DB_USER"],
-        password=os.environ["DB_PASSWORD"],
-        database=os.environ["DB_NAME"],
-        cursorclass=pymysql.cursors.DictCursor,
-    )
-
-
 def response(status_code, body):
     return {
         "statusCode": status_code,
@@ -50,7 +38,7 @@ def lambda_handler(event, context):
     body = json.loads(event.get("body", "{}"))
 
     try:
-        connection = create_connection()
+        connection = get_connection()
         with connection.cursor() as cur:
             cur.execute(SELECT_MATCH_SQL, (int(tournament_match_id),))
             match = cur.fetchone()
@@ -66,9 +54,6 @@ def lambda_handler(event, context):
             tournament_id_entry = cur.fetchone()
             tournament_id = tournament_id_entry["value"]
 
-            api_url = f"https://americas.api.riotgames.com/lol/tournament/v5/codes?tournamentId={tournament_id}&count=1"
-            headers = {"X-Riot-Token": os.environ["RIOT_API_KEY"]}
-
             body = {
                 "enoughPlayers": True,
                 "mapType": body.get("map", "SUMMONERS_RIFT"),
@@ -77,7 +62,12 @@ def lambda_handler(event, context):
                 "spectatorType": "ALL",
                 "teamSize": body.get("team_size", 5),
             }
-            api_response = requests.post(api_url, headers=headers, json=body)
+            api_response = get_client().post(
+                "americas",
+                "/lol/tournament/v5/codes",
+                params={"tournamentId": tournament_id, "count": 1},
+                json=body,
+            )
             lobby_code = api_response.json()[0]
 
             cur.execute(
@@ -94,4 +84,4 @@ def lambda_handler(event, context):
 
     finally:
         if connection:
-            connection.close()
+            release_connection(connection)
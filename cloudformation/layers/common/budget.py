@@ -0,0 +1,41 @@
+import os
+import time
+from contextlib import contextmanager
+
+# Time kept free at the end of an invocation for the final commit and response.
+SAFETY_MARGIN_MS = int(os.environ.get("TIME_BUDGET_MARGIN_MS", 5000))
+
+
+class TimeBudget:
+    """
+    Decides whether a drain loop can start another chunk of work before the
+    Lambda runs out of time. It keeps room for the safety margin plus one
+    more chunk as slow as the slowest seen so far.
+
+        budget = TimeBudget(context)
+        while budget.has_time():
+            with budget.chunk():
+                ...
+    """
+
+    def __init__(self, context, margin_ms: int = SAFETY_MARGIN_MS):
+        self.context = context
+        self.margin_ms = margin_ms
+        self.slowest_chunk_ms = 0
+        self.chunks = 0
+
+    def remaining_ms(self) -> int:
+        return self.context.get_remaining_time_in_millis()
+
+    def has_time(self) -> bool:
+        return self.remaining_ms() - self.slowest_chunk_ms > self.margin_ms
+
+    @contextmanager
+    def chunk(self):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed_ms = int((time.monotonic() - started) * 1000)
+            self.slowest_chunk_ms = max(self.slowest_chunk_ms, elapsed_ms)
+            self.chunks += 1
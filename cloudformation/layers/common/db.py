@@ -0,0 +1,93 @@
+import os
+import pymysql
+from pymysql.constants import SERVER_STATUS
+
+# One connection per warm Lambda container. It survives between invocations so
+# only cold starts (or a dropped socket) pay the TCP + auth handshake.
+connection = None
+# Whether this invocation has already checked the connection. Cleared by
+# release_connection, so the ping happens once per invocation, not per call.
+checked = False
+
+
+def create_connection() -> pymysql.Connection:
+    return pymysql.connect(
+        host=os.environ["DB_HOST"],
+        port=int(os.environ["DB_PORT"]),
+        user=os.environ["DB_USER"],
+        password=os.environ["DB_PASSWORD"],
+        database=os.environ["DB_NAME"],
+        cursorclass=pymysql.cursors.DictCursor,
+    )
+
+
+def get_connection() -> pymysql.Connection:
+    """
+    Return the container's warm connection, opening it on first use. The
+    first call of an invocation also replaces it if a ping shows the server
+    has dropped it and rolls back a transaction a previous invocation left
+    open; later calls return it as is, so work in progress is never lost.
+    """
+    global connection, checked
+
+    if connection is None:
+        connection = create_connection()
+    elif not checked:
+        try:
+            connection.ping(reconnect=False)
+            if in_transaction(connection):
+                connection.rollback()
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            discard_connection()
+            connection = create_connection()
+
+    checked = True
+    return connection
+
+
+def release_connection(conn: pymysql.Connection | None = None) -> None:
+    """
+    Hand the connection back at the end of an invocation. Anything left
+    uncommitted is rolled back so the next invocation starts a fresh
+    transaction (and a fresh snapshot) instead of inheriting this one, and
+    the next get_connection checks the connection again.
+    """
+    global checked
+
+    checked = False
+    conn = conn or connection
+    if conn is None or not in_transaction(conn):
+        return
+
+    try:
+        conn.rollback()
+    except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+        discard_connection()
+
+
+def in_transaction(conn: pymysql.Connection) -> bool:
+    # server_status comes from the last OK/EOF packet, so this costs no round-trip
+    return bool(conn.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS)
+
+
+def discard_connection() -> None:
+    global connection
+
+    if connection is not None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    connection = None
+
+
+def not_in(column: str, values) -> tuple[str, list]:
+    """
+    Build an `AND column NOT IN (...)` filter and its parameters. Returns an
+    empty filter when there is nothing to exclude.
+    """
+    values = list(values)
+    if not values:
+        return "", []
+    placeholders = ",".join(["%s"] * len(values))
+    return f"AND {column} NOT IN ({placeholders})", values
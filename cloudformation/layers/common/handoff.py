@@ -0,0 +1,96 @@
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Set on the producing Lambda by main.yaml. Without it (sam local invoke,
+# scripts, tests) messages go to an in-process LocalQueue instead.
+QUEUE_URL_ENV = "MATCH_PROCESSING_QUEUE_URL"
+
+queue = None
+
+
+class SqsQueue:
+    def __init__(self, queue_url: str):
+        import boto3
+
+        self.queue_url = queue_url
+        self.client = boto3.client("sqs")
+
+    def send(self, match_ids: list[str]) -> None:
+        self.client.send_message(
+            QueueUrl=self.queue_url, MessageBody=json.dumps({"match_ids": match_ids})
+        )
+
+
+class LocalQueue:
+    """
+    In-process stand-in for the SQS queue. Messages stay in memory until
+    drain() hands them to a handler as an SQS-shaped event, e.g.
+
+        queue = get_queue()
+        get_match_data.lambda_handler({}, context)
+        queue.drain(process_match_data.lambda_handler, context)
+    """
+
+    def __init__(self):
+        self.messages: list[str] = []
+
+    def send(self, match_ids: list[str]) -> None:
+        self.messages.append(json.dumps({"match_ids": match_ids}))
+
+    def drain(self, handler, context=None):
+        if not self.messages:
+            return None
+        event = {
+            "Records": [
+                {"messageId": str(index), "body": body, "eventSource": "local"}
+                for index, body in enumerate(self.messages)
+            ]
+        }
+        self.messages = []
+        return handler(event, context)
+
+
+def get_queue() -> SqsQueue | LocalQueue:
+    global queue
+    if queue is None:
+        queue_url = os.environ.get(QUEUE_URL_ENV)
+        queue = SqsQueue(queue_url) if queue_url else LocalQueue()
+    return queue
+
+
+def hand_off(match_ids: list[str]) -> bool:
+    """
+    Push freshly fetched matches to the processing stage. Losing a message is
+    harmless - the scheduled sweep still finds the rows - so failures are
+    logged rather than raised.
+    """
+    if not match_ids:
+        return True
+    try:
+        get_queue().send(list(match_ids))
+        return True
+    except Exception as e:
+        logger.warning(f"Could not hand off {len(match_ids)} matches: {str(e)}")
+        return False
+
+
+def messages_from_event(event) -> dict[str, list[str]] | None:
+    """
+    Match IDs carried by a queue event, keyed by message ID so unfinished
+    messages can be reported back as batch item failures. None for a
+    scheduled run.
+    """
+    records = (event or {}).get("Records")
+    if not records:
+        return None
+
+    messages = {}
+    for record in records:
+        try:
+            messages[record["messageId"]] = json.loads(record["body"])["match_ids"]
+        except (KeyError, TypeError, ValueError):
+            logger.warning(f"Ignoring malformed message {record.get('messageId')}")
+    return messages
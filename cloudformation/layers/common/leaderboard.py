@@ -0,0 +1,28 @@
+# Leaderboards and the profiles column each one is ranked by
+BOARDS = {
+    "pickems": "pickems_score",
+    "dream-draft": "dd_score",
+}
+
+DELETE_RANKS_SQL = "DELETE FROM leaderboard_ranks WHERE board = %s"
+
+INSERT_RANKS_SQL = """
+    INSERT INTO leaderboard_ranks (board, `rank`, profile_id, score)
+    SELECT %s,
+        ROW_NUMBER() OVER (ORDER BY p.{column} DESC, p.id ASC),
+        p.id,
+        p.{column}
+    FROM profiles AS p;
+"""
+
+
+def rebuild_ranks(cursor, board: str) -> int:
+    """
+    Recompute every position on `board` from the current scores and profiles.
+    The board's scoring job calls it on every run, inside the same
+    transaction as any score changes, so readers see either the old ranking
+    or the new one. Returns the number of ranked rows.
+    """
+    cursor.execute(DELETE_RANKS_SQL, (board,))
+    cursor.execute(INSERT_RANKS_SQL.format(column=BOARDS[board]), (board,))
+    return cursor.rowcount
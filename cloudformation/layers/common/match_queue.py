@@ -0,0 +1,117 @@
+import os
+import pymysql
+
+# A claim has to outlive the Lambda that made it, otherwise a second worker
+# could pick the same rows while the first is still working on them.
+LEASE_SECONDS = int(os.environ.get("MATCH_LEASE_SECONDS", 120))
+
+# Rows waiting for each stage of the match pipeline. has_data is generated from
+# match_data_key and leads idx_match_history_stage, so both are index ranges.
+# Matches get-match-data gave up on carry a fetch_error and drop out.
+FETCH_STAGE = "has_data = FALSE AND fetch_error IS NULL"
+PROCESS_STAGE = "has_data = TRUE AND was_processed = 'false'"
+
+SELECT_CLAIMABLE_SQL = """
+    SELECT match_id
+    FROM match_history
+    WHERE {stage}
+        AND (lease_expires_at IS NULL OR lease_expires_at < NOW())
+    LIMIT %s
+    FOR UPDATE SKIP LOCKED;
+"""
+
+SELECT_CLAIMABLE_IDS_SQL = """
+    SELECT match_id
+    FROM match_history
+    WHERE {stage}
+        AND (lease_expires_at IS NULL OR lease_expires_at < NOW())
+        AND match_id IN ({inlist})
+    FOR UPDATE SKIP LOCKED;
+"""
+
+CLAIM_SQL = """
+    UPDATE match_history
+    SET lease_owner = %s,
+        lease_expires_at = NOW() + INTERVAL %s SECOND
+    WHERE match_id IN ({inlist});
+"""
+
+RELEASE_SQL = """
+    UPDATE match_history
+    SET lease_owner = NULL,
+        lease_expires_at = NULL
+    WHERE lease_owner = %s AND match_id IN ({inlist});
+"""
+
+# Only rows a run could claim right now count towards the backlog. Leased rows
+# (in flight, or failed and backing off) and given-up fetches would otherwise
+# keep the self-adjusting schedules at their fastest.
+COUNT_STAGE_SQL = """
+    SELECT COUNT(*) AS backlog
+    FROM match_history
+    WHERE {stage}
+        AND (lease_expires_at IS NULL OR lease_expires_at < NOW());
+"""
+
+
+def claim_matches(
+    connection: pymysql.Connection,
+    stage: str,
+    worker_id: str,
+    limit: int,
+    match_ids: list[str] | None = None,
+) -> list[str]:
+    """
+    Lease up to `limit` rows waiting for `stage` to `worker_id` and commit the
+    claim. Rows locked or leased by another worker are skipped, and leases
+    that expired (their worker died or timed out) are taken over.
+
+    With `match_ids` only those rows are considered; any that already moved
+    past `stage` or belong to another worker are left out of the result.
+    """
+    if match_ids is None:
+        select_sql, params = SELECT_CLAIMABLE_SQL.format(stage=stage), (limit,)
+    elif match_ids:
+        match_ids = match_ids[:limit]
+        placeholders = ",".join(["%s"] * len(match_ids))
+        select_sql = SELECT_CLAIMABLE_IDS_SQL.format(stage=stage, inlist=placeholders)
+        params = match_ids
+    else:
+        return []
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(select_sql, params)
+            match_ids = [row["match_id"] for row in cursor.fetchall()]
+
+            if match_ids:
+                placeholders = ",".join(["%s"] * len(match_ids))
+                cursor.execute(
+                    CLAIM_SQL.format(inlist=placeholders),
+                    (worker_id, LEASE_SECONDS, *match_ids),
+                )
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+
+    return match_ids
+
+
+def release_matches(
+    connection: pymysql.Connection, match_ids: list[str], worker_id: str
+) -> None:
+    """Give back leases early so the rows can be claimed again straight away."""
+    if not match_ids:
+        return
+
+    placeholders = ",".join(["%s"] * len(match_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(RELEASE_SQL.format(inlist=placeholders), (worker_id, *match_ids))
+    connection.commit()
+
+
+def count_stage(connection: pymysql.Connection, stage: str) -> int:
+    with connection.cursor() as cursor:
+        cursor.execute(COUNT_STAGE_SQL.format(stage=stage))
+        return int(cursor.fetchone()["backlog"])
@@ -0,0 +1,119 @@
+import gzip
+import os
+from abc import ABC, abstractmethod
+
+# Raw Riot match payloads live here instead of inline in match_history, which
+# only keeps the object key and a little metadata. Deployed Lambdas get a
+# MATCH_STORE_BUCKET; without one (sam local invoke, scripts, tests) payloads
+# are written under MATCH_STORE_DIR on the local filesystem.
+BUCKET_ENV = "MATCH_STORE_BUCKET"
+DIR_ENV = "MATCH_STORE_DIR"
+DEFAULT_DIR = "/tmp/match-store"
+PREFIX = "matches/"
+
+store = None
+
+
+class MatchStore(ABC):
+    """Gzip-compressed JSON payloads keyed by match ID."""
+
+    def key(self, match_id: str) -> str:
+        return f"{PREFIX}{match_id}.json.gz"
+
+    def put(self, match_id: str, payload: bytes | str) -> tuple[str, int]:
+        """Store a payload, returning its key and compressed size in bytes."""
+        if isinstance(payload, str):
+            payload = payload.encode()
+        key = self.key(match_id)
+        body = gzip.compress(payload, compresslevel=6)
+        self.write(key, body)
+        return key, len(body)
+
+    def get(self, key: str) -> bytes:
+        """The decompressed payload stored under `key`."""
+        return gzip.decompress(self.read(key))
+
+    def find(self, match_id: str) -> tuple[str, int, bytes] | None:
+        """
+        The key, compressed size and payload already stored for `match_id`,
+        or None. Match payloads never change once a game is over, so a
+        stored copy can always stand in for another Riot call.
+        """
+        key = self.key(match_id)
+        body = self.read_if_exists(key)
+        if body is None:
+            return None
+        return key, len(body), gzip.decompress(body)
+
+    @abstractmethod
+    def write(self, key: str, body: bytes) -> None: ...
+
+    @abstractmethod
+    def read(self, key: str) -> bytes: ...
+
+    @abstractmethod
+    def read_if_exists(self, key: str) -> bytes | None: ...
+
+
+class S3MatchStore(MatchStore):
+    def __init__(self, bucket: str):
+        import boto3
+
+        self.bucket = bucket
+        self.client = boto3.client("s3")
+
+    def write(self, key: str, body: bytes) -> None:
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body=body,
+            ContentType="application/json",
+            ContentEncoding="gzip",
+        )
+
+    def read(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    def read_if_exists(self, key: str) -> bytes | None:
+        try:
+            return self.read(key)
+        except self.client.exceptions.NoSuchKey:
+            return None
+
+
+class LocalMatchStore(MatchStore):
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def write(self, key: str, body: bytes) -> None:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write-then-rename so a concurrent reader never sees half a file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+
+    def read(self, key: str) -> bytes:
+        with open(self.path(key), "rb") as f:
+            return f.read()
+
+    def read_if_exists(self, key: str) -> bytes | None:
+        try:
+            return self.read(key)
+        except FileNotFoundError:
+            return None
+
+
+def get_store() -> MatchStore:
+    global store
+    if store is None:
+        bucket = os.environ.get(BUCKET_ENV)
+        if bucket:
+            store = S3MatchStore(bucket)
+        else:
+            store = LocalMatchStore(os.environ.get(DIR_ENV, DEFAULT_DIR))
+    return store
@@ -0,0 +1,88 @@
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Scheduled ingestion jobs pick their own next run from the backlog they just
+# reported: back off while idle, tighten up while work is piling up. The
+# schedule they run on is named in SCHEDULE_NAME; without one (local runs)
+# the decision is only logged.
+SCHEDULE_NAME_ENV = "SCHEDULE_NAME"
+MIN_MINUTES = int(os.environ.get("SCHEDULE_MIN_MINUTES", 2))
+MAX_MINUTES = int(os.environ.get("SCHEDULE_MAX_MINUTES", 60))
+# A backlog this big means one run can't keep up, so go straight to the minimum
+BUSY_BACKLOG = int(os.environ.get("SCHEDULE_BUSY_BACKLOG", 50))
+
+scheduler_client = None
+
+
+def next_interval(
+    backlog: int,
+    current: int,
+    min_minutes: int = MIN_MINUTES,
+    max_minutes: int = MAX_MINUTES,
+    busy_backlog: int = BUSY_BACKLOG,
+) -> int:
+    """Minutes until the next run, given what is still waiting after this one."""
+    if backlog >= busy_backlog:
+        return min_minutes
+    if backlog > 0:
+        return max(min_minutes, current // 2)
+    return min(max_minutes, max(current, 1) * 2)
+
+
+def rate_expression(minutes: int) -> str:
+    return f"rate({minutes} minute{'s' if minutes != 1 else ''})"
+
+
+def current_minutes(expression: str) -> int | None:
+    # "rate(10 minutes)" -> 10, "rate(1 hour)" -> 60
+    if not expression.startswith("rate(") or not expression.endswith(")"):
+        return None
+    value, _, unit = expression[5:-1].partition(" ")
+    if not value.isdigit():
+        return None
+    return int(value) * (60 if unit.startswith("hour") else 1)
+
+
+def reschedule(backlog: int) -> int | None:
+    """
+    Move this job's schedule to the interval its backlog calls for. Returns
+    the new interval in minutes, or None if there is no schedule to manage.
+    Failures are logged only; the job then simply keeps its current rate.
+    """
+    schedule_name = os.environ.get(SCHEDULE_NAME_ENV)
+    if not schedule_name:
+        logger.info(f"No schedule to adapt (backlog {backlog}).")
+        return None
+
+    global scheduler_client
+    try:
+        if scheduler_client is None:
+            import boto3
+
+            scheduler_client = boto3.client("scheduler")
+
+        schedule = scheduler_client.get_schedule(Name=schedule_name)
+        current = current_minutes(schedule["ScheduleExpression"]) or MIN_MINUTES
+        minutes = next_interval(backlog, current)
+        if minutes == current:
+            return minutes
+
+        # UpdateSchedule replaces the whole definition, so send it back as-is
+        scheduler_client.update_schedule(
+            Name=schedule_name,
+            GroupName=schedule["GroupName"],
+            ScheduleExpression=rate_expression(minutes),
+            FlexibleTimeWindow=schedule["FlexibleTimeWindow"],
+            Target=schedule["Target"],
+            State=schedule["State"],
+        )
+        logger.info(
+            f"Backlog {backlog}: {schedule_name} moved from every {current} "
+            f"to every {minutes} minutes."
+        )
+        return minutes
+    except Exception as e:
+        logger.warning(f"Could not reschedule {schedule_name}: {str(e)}")
+        return None
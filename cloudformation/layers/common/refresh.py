@@ -0,0 +1,69 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from riot import RiotRateLimited
+
+logger = logging.getLogger(__name__)
+
+MARK_FETCHED_SQL = """
+    UPDATE riot_accounts
+    SET {column} = NOW()
+    WHERE account_puuid IN ({inlist});
+"""
+
+
+def fetch_all(fetch, keys: list, workers: int) -> tuple[dict, list, bool]:
+    """
+    Run fetch(key) for every key on a bounded thread pool; the shared Riot
+    client keeps the pool inside the rate budget.
+
+    Returns the results by key, the keys Riot rejected outright (4xx other
+    than 429, which retrying soon won't fix) and whether the rate limit
+    stopped us early. Anything not started by then is cancelled; it and any
+    transient failure are simply left for the next run.
+    """
+    results = {}
+    rejected = []
+    rate_limited = False
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fetch, key): key for key in keys}
+
+        for future in as_completed(futures):
+            key = futures[future]
+            if future.cancelled():
+                continue
+            try:
+                results[key] = future.result()
+                continue
+            except RiotRateLimited as e:
+                stop = str(e)
+            except requests.exceptions.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if status != 429:
+                    logger.error(f"Error fetching {key}: {str(e)}")
+                    if status is not None and status < 500:
+                        rejected.append(key)
+                    continue
+                stop = "Rate limited by Riot API"
+            except Exception as e:
+                logger.error(f"Error fetching {key}: {str(e)}")
+                continue
+
+            if not rate_limited:
+                logger.warning(f"Stopping batch early: {stop}")
+            rate_limited = True
+            for pending in futures:
+                pending.cancel()
+
+    return results, rejected, rate_limited
+
+
+def mark_fetched(cursor, column: str, puuids: list) -> None:
+    """Stamp `column` (a riot_accounts last_*_fetch column) for all `puuids`."""
+    if not puuids:
+        return
+    placeholders = ",".join(["%s"] * len(puuids))
+    cursor.execute(MARK_FETCHED_SQL.format(column=column, inlist=placeholders), puuids)
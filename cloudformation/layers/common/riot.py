@@ -0,0 +1,271 @@
+import logging
+import os
+import threading
+import time
+from urllib.parse import quote
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Limits of a development key, used until Riot tells us the real ones.
+DEFAULT_APP_LIMITS = "20:1,100:120"
+
+client = None
+
+
+class RiotRateLimited(Exception):
+    """Raised when the next request would have to wait longer than allowed."""
+
+    def __init__(self, wait: float):
+        super().__init__(f"Riot API rate limit reached, next slot in {wait:.1f}s")
+        self.wait = wait
+
+
+def parse_rate_limits(header: str | None) -> dict[int, int]:
+    # "20:1,100:120" -> {1: 20, 120: 100}  (window seconds -> value)
+    limits = {}
+    for part in (header or "").split(","):
+        value, _, window = part.strip().partition(":")
+        if value.isdigit() and window.isdigit():
+            limits[int(window)] = int(value)
+    return limits
+
+
+class TokenBucket:
+    def __init__(self, limit: int, window: int):
+        self.limit = limit
+        self.window = window
+        self.tokens = float(limit)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        rate = self.limit / self.window
+        self.tokens = min(self.limit, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        self.refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) * self.window / self.limit
+
+    def sync(self, count: int, now: float) -> None:
+        # Riot's own counter wins if it has seen more requests than we have
+        self.refill(now)
+        self.tokens = min(self.tokens, self.limit - count)
+
+
+class RateLimiter:
+    """A set of token buckets (one per window) for one app or method scope."""
+
+    def __init__(self, limits: str | None = None):
+        self.lock = threading.Lock()
+        self.buckets = {
+            window: TokenBucket(limit, window)
+            for window, limit in parse_rate_limits(limits).items()
+        }
+        self.blocked_until = 0.0
+
+    def reserve(self) -> float:
+        """Take a token from every bucket, or return how long to wait first."""
+        with self.lock:
+            now = time.monotonic()
+            wait = max(
+                [self.blocked_until - now]
+                + [bucket.wait_time(now) for bucket in self.buckets.values()]
+            )
+            if wait > 0:
+                return wait
+            for bucket in self.buckets.values():
+                bucket.tokens -= 1
+            return 0.0
+
+    def refund(self) -> None:
+        with self.lock:
+            for bucket in self.buckets.values():
+                bucket.tokens = min(bucket.limit, bucket.tokens + 1)
+
+    def update(self, limit_header: str | None, count_header: str | None) -> None:
+        limits = parse_rate_limits(limit_header)
+        if not limits:
+            return
+        counts = parse_rate_limits(count_header)
+
+        with self.lock:
+            now = time.monotonic()
+            for window, limit in limits.items():
+                bucket = self.buckets.get(window)
+                if bucket is None or bucket.limit != limit:
+                    bucket = self.buckets[window] = TokenBucket(limit, window)
+                if window in counts:
+                    bucket.sync(counts[window], now)
+            for window in set(self.buckets) - set(limits):
+                del self.buckets[window]
+
+    def block(self, seconds: float) -> None:
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class RiotClient:
+    """
+    Thin wrapper around the Riot API that keeps per-app (per routing value)
+    and per-method token buckets in sync with the X-*-Rate-Limit headers,
+    honours Retry-After on 429 and retries idempotent GETs.
+
+    One instance is meant to live for the whole warm container (see
+    get_client) and can be shared between threads.
+    """
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        max_retries: int = 3,
+        max_wait: float = 10.0,
+        timeout: float = 10.0,
+        app_limits: str = DEFAULT_APP_LIMITS,
+    ):
+        self.api_key = api_key or os.environ["RIOT_API_KEY"]
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self.default_app_limits = app_limits
+        self.session = requests.Session()
+        self.lock = threading.Lock()
+        self.app_limiters: dict[str, RateLimiter] = {}
+        self.method_limiters: dict[tuple[str, str], RateLimiter] = {}
+
+    def get(self, routing: str, route: str, *, params=None, **path_params):
+        return self.request("GET", routing, route, params=params, **path_params)
+
+    def post(self, routing: str, route: str, *, params=None, json=None, **path_params):
+        return self.request(
+            "POST", routing, route, params=params, json=json, **path_params
+        )
+
+    def request(
+        self,
+        method: str,
+        routing: str,
+        route: str,
+        *,
+        params=None,
+        json=None,
+        **path_params,
+    ) -> requests.Response:
+        """
+        Call https://{routing}.api.riotgames.com{route}. `route` is the path
+        template (e.g. "/lol/match/v5/matches/{match_id}") and doubles as the
+        method-limit key; `path_params` fill it in.
+
+        Raises RiotRateLimited if a free slot is further away than max_wait.
+        A 429 that survives every retry is returned to the caller as-is.
+        """
+        app_limiter, method_limiter = self.limiters(routing, route)
+        path = route.format(
+            **{key: quote(str(value), safe="") for key, value in path_params.items()}
+        )
+        url = f"https://{routing}.api.riotgames.com{path}"
+        retry = method == "GET"
+        attempt = 0
+
+        while True:
+            self.acquire(app_limiter, method_limiter)
+
+            try:
+                response = self.session.request(
+                    method,
+                    url,
+                    headers={"X-Riot-Token": self.api_key},
+                    params=params,
+                    json=json,
+                    timeout=self.timeout,
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                if not retry or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self.sleep(2 ** (attempt - 1))
+                continue
+
+            app_limiter.update(
+                response.headers.get("X-App-Rate-Limit"),
+                response.headers.get("X-App-Rate-Limit-Count"),
+            )
+            method_limiter.update(
+                response.headers.get("X-Method-Rate-Limit"),
+                response.headers.get("X-Method-Rate-Limit-Count"),
+            )
+
+            if response.status_code == 429:
+                retry_after = float(response.headers.get("Retry-After", 1))
+                limit_type = response.headers.get("X-Rate-Limit-Type")
+                logger.warning(
+                    f"Rate limited by Riot API ({limit_type or 'service'}) on "
+                    f"{route}. Retry after {retry_after}s."
+                )
+
+                if limit_type == "application":
+                    app_limiter.block(retry_after)
+                elif limit_type == "method":
+                    method_limiter.block(retry_after)
+
+                if not retry or attempt >= self.max_retries:
+                    return response
+                attempt += 1
+
+                # application/method blocks are waited out in acquire()
+                if limit_type not in ("application", "method"):
+                    self.sleep(retry_after)
+                continue
+
+            if response.status_code >= 500 and retry and attempt < self.max_retries:
+                attempt += 1
+                self.sleep(2 ** (attempt - 1))
+                continue
+
+            return response
+
+    def limiters(self, routing: str, route: str) -> tuple[RateLimiter, RateLimiter]:
+        with self.lock:
+            app_limiter = self.app_limiters.get(routing)
+            if app_limiter is None:
+                app_limiter = self.app_limiters[routing] = RateLimiter(
+                    self.default_app_limits
+                )
+            method_limiter = self.method_limiters.get((routing, route))
+            if method_limiter is None:
+                method_limiter = self.method_limiters[(routing, route)] = (
+                    RateLimiter()
+                )
+        return app_limiter, method_limiter
+
+    def acquire(self, *limiters: RateLimiter) -> None:
+        while True:
+            reserved = []
+            wait = 0.0
+            for limiter in limiters:
+                wait = limiter.reserve()
+                if wait:
+                    break
+                reserved.append(limiter)
+            if not wait:
+                return
+            # all-or-nothing: hand back tokens taken before the full bucket
+            for limiter in reserved:
+                limiter.refund()
+            self.sleep(wait)
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > self.max_wait:
+            raise RiotRateLimited(seconds)
+        time.sleep(seconds)
+
+
+def get_client() -> RiotClient:
+    """Return the container's shared client so buckets survive warm starts."""
+    global client
+    if client is None:
+        client = RiotClient()
+    return client
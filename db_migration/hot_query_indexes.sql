@@ -0,0 +1,35 @@
+-- Indexes for the queries that run on every request or every pipeline run.
+-- scripts/explain_hot_queries.py seeds a scratch schema and prints the plans
+-- of those queries before and after these statements.
+
+-- Every authorized request looks its caller up by token
+ALTER TABLE tournament_db.profiles
+ADD UNIQUE INDEX uq_profiles_token (token);
+
+-- Leaderboards, highest score first, ties by id
+ALTER TABLE tournament_db.profiles
+ADD INDEX idx_profiles_pickems_score (pickems_score DESC, id),
+ADD INDEX idx_profiles_dd_score (dd_score DESC, id);
+
+-- Match pipeline stages (layers/common/match_queue.py). has_data is a
+-- one-byte stand-in for match_data_key IS NOT NULL, so both stages and their
+-- lease check are a range on one small index instead of a table scan.
+ALTER TABLE tournament_db.match_history
+ADD COLUMN has_data BOOLEAN
+    AS (match_data_key IS NOT NULL) VIRTUAL,
+ADD INDEX idx_match_history_stage (has_data, was_processed, lease_expires_at);
+
+-- Stale-account picks in refresh-accounts, one per refresh type
+ALTER TABLE tournament_db.riot_accounts
+ADD INDEX idx_riot_accounts_match_history_fetch (last_match_history_fetch),
+ADD INDEX idx_riot_accounts_player_stats_fetch (last_player_stats_fetch),
+ADD INDEX idx_riot_accounts_champion_mastery_fetch (last_champion_mastery_fetch);
+
+-- pickems.user_id is already indexed through fk_pickems_user_id. Scoring
+-- reads every answer to one category at a time.
+ALTER TABLE tournament_db.pickems
+ADD INDEX idx_pickems_pickem_value (pickem_id, value);
+
+-- Upcoming tournament games, for the refresh-accounts boost
+ALTER TABLE tournament_db.tournament_matches
+ADD INDEX idx_tournament_matches_start_date (start_date);
@@ -0,0 +1,13 @@
+-- Fantasy points each player earned in each tournament game, computed once
+-- from processed_match_data and summed into profiles.dd_score for every
+-- dream-draft lineup that picked the player.
+CREATE TABLE IF NOT EXISTS tournament_db.dreamdraft_player_points (
+    match_id VARCHAR(255) NOT NULL,
+    player_id INT NOT NULL,
+    points DECIMAL(8, 2) NOT NULL,
+    PRIMARY KEY (match_id, player_id),
+    KEY idx_dreamdraft_player_points_player (player_id, points),
+    CONSTRAINT fk_dreamdraft_player_points_player
+        FOREIGN KEY (player_id) REFERENCES tournament_db.players (id)
+        ON DELETE CASCADE ON UPDATE CASCADE
+);
@@ -0,0 +1,16 @@
+-- Precomputed leaderboard positions, one row per profile per board. Rebuilt
+-- by layers/common/leaderboard.py on every run of a board's scoring job, so
+-- new and deleted profiles are picked up within one schedule interval. Page
+-- views and rank lookups are primary-key seeks instead of a window over every
+-- profile.
+CREATE TABLE IF NOT EXISTS tournament_db.leaderboard_ranks (
+    board VARCHAR(20) NOT NULL,
+    `rank` INT NOT NULL,
+    profile_id INT NOT NULL,
+    score INT NOT NULL,
+    PRIMARY KEY (board, `rank`),
+    UNIQUE KEY uq_leaderboard_ranks_profile (board, profile_id),
+    CONSTRAINT fk_leaderboard_ranks_profile
+        FOREIGN KEY (profile_id) REFERENCES tournament_db.profiles (id)
+        ON DELETE CASCADE
+);
@@ -8,4 +8,24 @@ MODIFY match_data JSON;
 
 ALTER TABLE tournament_db.match_history
 ADD COLUMN was_processed VARCHAR(10) NOT NULL DEFAULT 'false'
-        CHECK (was_processed IN ('true', 'false'));
\ No newline at end of file
+        CHECK (was_processed IN ('true', 'false'));
+
+ALTER TABLE tournament_db.match_history
+ADD COLUMN lease_owner VARCHAR(64) DEFAULT NULL,
+ADD COLUMN lease_expires_at DATETIME DEFAULT NULL;
+
+-- Raw payloads live gzip-compressed in the match store (S3), keyed by
+-- match_data_key. Inline match_data is only left on rows fetched before the
+-- move; get-match-data copies those out and clears it as it reaches them.
+ALTER TABLE tournament_db.match_history
+ADD COLUMN match_data_key VARCHAR(255) DEFAULT NULL,
+ADD COLUMN match_data_size INT DEFAULT NULL,
+ADD COLUMN queue_id INT DEFAULT NULL,
+ADD COLUMN game_creation BIGINT DEFAULT NULL;
+
+-- get-match-data counts transient fetch failures per match and sets
+-- fetch_error once Riot rejects the ID (4xx) or the attempts run out. Rows
+-- with a fetch_error are no longer claimed; clear it to retry them.
+ALTER TABLE tournament_db.match_history
+ADD COLUMN fetch_attempts INT NOT NULL DEFAULT 0,
+ADD COLUMN fetch_error VARCHAR(255) DEFAULT NULL;
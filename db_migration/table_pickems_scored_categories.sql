@@ -0,0 +1,10 @@
+-- The answers each pickem category was last scored with. The scoring job
+-- takes back what the old answers awarded and adds what the new ones award,
+-- only for categories that resolved or were corrected. pickems/put refuses
+-- picks in a resolved category, so those deltas stay exact.
+CREATE TABLE IF NOT EXISTS tournament_db.pickems_scored_categories (
+    pickem_id VARCHAR(255) PRIMARY KEY,
+    answers JSON NOT NULL,
+    points INT NOT NULL,
+    scored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
@@ -52,3 +52,7 @@ ADD COLUMN last_player_stats_fetch DATETIME DEFAULT NULL;
 ALTER TABLE tournament_db.riot_accounts
 ADD COLUMN last_champion_mastery_fetch DATETIME DEFAULT NULL;
 
+
+-- Epoch seconds passed as startTime on the next match-ID fetch for the account
+ALTER TABLE tournament_db.riot_accounts
+ADD COLUMN match_history_watermark BIGINT DEFAULT NULL;
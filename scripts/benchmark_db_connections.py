@@ -0,0 +1,85 @@
+"""
+Times warm-connection reuse (layers/common/db.py) against the old pattern of
+opening a connection for every request, so the saving per invocation can be
+measured against a real database instead of assumed.
+
+Each "request" runs the same small query the authorizer sends:
+  per-call - pymysql.connect, query, close (previous behaviour)
+  warm     - get_connection, query, release_connection
+
+Uses the same DB_* environment variables as the Lambdas.
+
+    python scripts/benchmark_db_connections.py [--requests 500] [--query "SELECT 1"]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(
+    0,
+    os.path.join(os.path.dirname(__file__), "..", "cloudformation", "layers", "common"),
+)
+import db  # noqa: E402
+
+
+def per_call(query: str) -> None:
+    connection = db.create_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(query)
+            cursor.fetchall()
+    finally:
+        connection.close()
+
+
+def warm(query: str) -> None:
+    connection = db.get_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(query)
+            cursor.fetchall()
+    finally:
+        db.release_connection(connection)
+
+
+def run(request, query: str, requests: int) -> list[float]:
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        request(query)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def percentile(timings: list[float], pct: int) -> float:
+    return statistics.quantiles(timings, n=100, method="inclusive")[pct - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument(
+        "--query", default="SELECT id, type FROM profiles WHERE token = 'benchmark'"
+    )
+    args = parser.parse_args()
+
+    # one untimed request each, so DNS and the first handshake don't skew p99
+    per_call(args.query)
+    warm(args.query)
+
+    for name, request in (("per-call", per_call), ("warm", warm)):
+        timings = run(request, args.query, args.requests)
+        print(
+            f"{name:8s} p50 {percentile(timings, 50):7.2f} ms   "
+            f"p99 {percentile(timings, 99):7.2f} ms   "
+            f"total {sum(timings) / 1000:6.2f} s for {args.requests} requests"
+        )
+
+    db.discard_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+One-off cleanup of the champ-select connections table after spectators moved
+from a JSON list on the lobby item into SPECTATORS#<lobby>#<n> shards.
+
+Connections opened before that deploy either have no CONN# item at all or
+one without a role, so disconnect can't tell which seat or shard to release.
+This script checks every connection it finds against the websocket API and:
+  - clears captain seats whose connection is gone,
+  - moves live spectators from a lobby's legacy list into their shard and
+    drops the list,
+  - removes gone connections from every shard,
+  - writes a CONN# item with role (and shard) for every live connection
+    that lacks one, and deletes CONN# items of gone connections.
+
+Run it once after deploying, with the same AWS credentials and region as the
+stack. The endpoint is the websocket stage URL, https://<api>.execute-api.
+<region>.amazonaws.com/<stage>.
+
+    python scripts/cleanup_champ_select_connections.py --table <ConnectionsTable> \\
+        --endpoint <websocket stage URL> [--dry-run]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import boto3
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(__file__),
+        "..",
+        "cloudformation",
+        "lambdas",
+        "champ-select-websockets",
+        "connect",
+        "src",
+    ),
+)
+import app as connect  # noqa: E402
+
+ddb_client = boto3.client("dynamodb")
+CAPTAINS = ("blueCaptain", "redCaptain")
+
+
+def scan(table_name: str):
+    paginator = ddb_client.get_paginator("scan")
+    for page in paginator.paginate(TableName=table_name):
+        yield from page.get("Items", [])
+
+
+class Liveness:
+    """Asks API Gateway once per connection ID whether it is still open."""
+
+    def __init__(self, endpoint: str):
+        self.client = boto3.client("apigatewaymanagementapi", endpoint_url=endpoint)
+        self.known = {}
+
+    def __call__(self, connection_id: str) -> bool:
+        if connection_id not in self.known:
+            try:
+                self.client.get_connection(ConnectionId=connection_id)
+                self.known[connection_id] = True
+            except self.client.exceptions.GoneException:
+                self.known[connection_id] = False
+        return self.known[connection_id]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--table", required=True)
+    parser.add_argument("--endpoint", required=True)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    table_name = args.table
+    live = Liveness(args.endpoint)
+    dry_run = args.dry_run
+    counts = {
+        "captains cleared": 0,
+        "spectators moved": 0,
+        "shard members removed": 0,
+        "mappings written": 0,
+        "mappings deleted": 0,
+    }
+
+    lobbies, shards, mappings = {}, {}, {}
+    for item in scan(table_name):
+        key = item["lobbyId"]["S"]
+        if key.startswith("LOBBY#"):
+            lobbies[key] = item
+        elif key.startswith("SPECTATORS#"):
+            shards[key] = item
+        elif key.startswith("CONN#"):
+            mappings[key.removeprefix("CONN#")] = item
+
+    def ensure_mapping(connection_id, lobby, captain, shard):
+        mapping = mappings.get(connection_id, {})
+        if "role" in mapping:
+            return
+        counts["mappings written"] += 1
+        item = connect.connection_item(connection_id, lobby, captain, shard)
+        mappings[connection_id] = item
+        if not dry_run:
+            connect.put_item(table_name, item)
+
+    for lobby_key, lobby in lobbies.items():
+        lobby_guid = lobby_key.removeprefix("LOBBY#")
+
+        for captain in CAPTAINS:
+            connection_id = lobby.get(captain, {}).get("S")
+            if not connection_id:
+                continue
+            if live(connection_id):
+                ensure_mapping(connection_id, lobby, captain, None)
+                continue
+            counts["captains cleared"] += 1
+            if not dry_run:
+                try:
+                    ddb_client.update_item(
+                        TableName=table_name,
+                        Key={"lobbyId": {"S": lobby_key}},
+                        UpdateExpression="SET #captain = :empty",
+                        ConditionExpression="#captain = :gone",
+                        ExpressionAttributeNames={"#captain": captain},
+                        ExpressionAttributeValues={
+                            ":empty": {"S": ""},
+                            ":gone": {"S": connection_id},
+                        },
+                    )
+                except ddb_client.exceptions.ConditionalCheckFailedException:
+                    pass
+
+        if "spectators" not in lobby:
+            continue
+        for connection_id in json.loads(lobby["spectators"]["S"]):
+            if not live(connection_id):
+                continue
+            counts["spectators moved"] += 1
+            shard = connect.spectator_shard(lobby_guid, connection_id)
+            if not dry_run:
+                connect.add_spectator(table_name, lobby, lobby_guid, connection_id)
+            ensure_mapping(connection_id, lobby, None, shard)
+        if not dry_run:
+            try:
+                ddb_client.update_item(
+                    TableName=table_name,
+                    Key={"lobbyId": {"S": lobby_key}},
+                    UpdateExpression="REMOVE spectators",
+                    ConditionExpression="spectators = :spectators",
+                    ExpressionAttributeValues={":spectators": lobby["spectators"]},
+                )
+            except ddb_client.exceptions.ConditionalCheckFailedException:
+                print(f"{lobby_key} changed while cleaning up; run again")
+
+    for shard_key, shard in shards.items():
+        lobby_key = "LOBBY#" + shard_key.split("#")[1]
+        lobby = lobbies.get(lobby_key, {"lobbyId": {"S": lobby_key}})
+        members = shard.get("connections", {}).get("SS", [])
+        gone = [connection_id for connection_id in members if not live(connection_id)]
+        for connection_id in members:
+            if connection_id not in gone:
+                ensure_mapping(connection_id, lobby, None, shard_key)
+        if gone:
+            counts["shard members removed"] += len(gone)
+            if not dry_run:
+                ddb_client.update_item(
+                    TableName=table_name,
+                    Key={"lobbyId": {"S": shard_key}},
+                    UpdateExpression="DELETE connections :gone",
+                    ExpressionAttributeValues={":gone": {"SS": gone}},
+                )
+
+    for connection_id in list(mappings):
+        if live(connection_id):
+            continue
+        counts["mappings deleted"] += 1
+        if not dry_run:
+            ddb_client.delete_item(
+                TableName=table_name,
+                Key={"lobbyId": {"S": f"CONN#{connection_id}"}},
+            )
+
+    for name, count in counts.items():
+        print(f"{name}: {count}{' (dry run)' if dry_run else ''}")
+
+
+if __name__ == "__main__":
+    main()
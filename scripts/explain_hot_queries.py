@@ -0,0 +1,307 @@
+"""
+Seeds a scratch schema with a tournament-sized dataset, then EXPLAINs the hot
+auth, leaderboard, pickems and pipeline queries before and after
+db_migration/hot_query_indexes.sql. Exits non-zero if any query still scans
+its whole table afterwards.
+
+The stale-account queries are built by refresh-accounts itself, so what is
+EXPLAINed is exactly what it sends; that needs its requirements installed.
+
+Uses the same DB_* environment variables as the Lambdas; the user needs to be
+able to create and drop the scratch schema.
+
+    python scripts/explain_hot_queries.py [--schema explain_scratch]
+"""
+
+import argparse
+import os
+import random
+import sys
+import uuid
+
+import pymysql
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(ROOT, "cloudformation", "layers", "common"))
+sys.path.insert(
+    0, os.path.join(ROOT, "cloudformation", "lambdas", "refresh-accounts", "src")
+)
+import app as refresh_accounts  # noqa: E402
+
+MIGRATION = os.path.join(
+    os.path.dirname(__file__), "..", "db_migration", "hot_query_indexes.sql"
+)
+
+SCHEMA_SQL = [
+    """
+    CREATE TABLE profiles (
+        id INT PRIMARY KEY AUTO_INCREMENT,
+        name VARCHAR(50) NOT NULL,
+        type VARCHAR(20) NOT NULL DEFAULT('user'),
+        token VARCHAR(255) NOT NULL DEFAULT(UUID()),
+        pickems_score INT NOT NULL DEFAULT(0),
+        dd_score INT NOT NULL DEFAULT(0)
+    )
+    """,
+    """
+    CREATE TABLE pickems (
+        id VARCHAR(255) PRIMARY KEY,
+        pickem_id VARCHAR(255) NOT NULL,
+        user_id INT NOT NULL,
+        value VARCHAR(255) NOT NULL,
+        CONSTRAINT fk_pickems_user_id FOREIGN KEY (user_id) REFERENCES profiles (id)
+    )
+    """,
+    """
+    CREATE TABLE match_history (
+        match_id VARCHAR(255) PRIMARY KEY,
+        match_data JSON,
+        was_processed VARCHAR(10) NOT NULL DEFAULT 'false',
+        lease_owner VARCHAR(64) DEFAULT NULL,
+        lease_expires_at DATETIME DEFAULT NULL,
+        match_data_key VARCHAR(255) DEFAULT NULL,
+        match_data_size INT DEFAULT NULL,
+        queue_id INT DEFAULT NULL,
+        game_creation BIGINT DEFAULT NULL,
+        fetch_attempts INT NOT NULL DEFAULT 0,
+        fetch_error VARCHAR(255) DEFAULT NULL
+    )
+    """,
+    """
+    CREATE TABLE riot_accounts (
+        id INT PRIMARY KEY AUTO_INCREMENT,
+        account_puuid VARCHAR(255) NOT NULL UNIQUE,
+        player_id INT NOT NULL,
+        last_match_history_fetch DATETIME DEFAULT NULL,
+        last_player_stats_fetch DATETIME DEFAULT NULL,
+        last_champion_mastery_fetch DATETIME DEFAULT NULL,
+        match_history_watermark BIGINT DEFAULT NULL
+    )
+    """,
+    """
+    CREATE TABLE players (
+        id INT PRIMARY KEY AUTO_INCREMENT,
+        team_id INT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE tournament_matches (
+        id INT PRIMARY KEY AUTO_INCREMENT,
+        team_1_id INT NOT NULL,
+        team_2_id INT NOT NULL,
+        start_date DATETIME NOT NULL
+    )
+    """,
+]
+
+
+def stale_accounts_sql(column: str) -> tuple[str, str]:
+    """refresh-accounts' pick and backlog queries for one last_*_fetch column."""
+    stale_from = refresh_accounts.stale_from(column)
+    params = refresh_accounts.stale_params()
+    pick = refresh_accounts.GET_STALE_ACCOUNTS_SQL.format(
+        column=column, stale_from=stale_from, exclude=""
+    ) % (*params, refresh_accounts.CHUNK_SIZE)
+    count = (
+        refresh_accounts.COUNT_STALE_ACCOUNTS_SQL.format(stale_from=stale_from) % params
+    )
+    return pick.strip().rstrip(";"), count.strip().rstrip(";")
+
+
+CLAIM_SQL = """
+    SELECT match_id FROM match_history
+    WHERE {stage}
+        AND (lease_expires_at IS NULL OR lease_expires_at < NOW())
+    LIMIT 50
+"""
+
+# (name, query before the migration, query after it)
+QUERIES = [
+    ("auth by token", "SELECT id, type FROM profiles WHERE token = 'x'", None),
+    (
+        "pickems leaderboard",
+        "SELECT id FROM profiles ORDER BY pickems_score DESC, id LIMIT 8",
+        None,
+    ),
+    (
+        "dream-draft leaderboard",
+        "SELECT id FROM profiles ORDER BY dd_score DESC, id LIMIT 8",
+        None,
+    ),
+    ("pickems by user", "SELECT * FROM pickems WHERE user_id = 42", None),
+    (
+        "pickems by category",
+        "SELECT user_id, value FROM pickems WHERE pickem_id = 'category-3'",
+        None,
+    ),
+    (
+        "claim fetch stage",
+        CLAIM_SQL.format(stage="match_data_key IS NULL"),
+        CLAIM_SQL.format(stage="has_data = FALSE AND fetch_error IS NULL"),
+    ),
+    (
+        "claim process stage",
+        CLAIM_SQL.format(
+            stage="match_data_key IS NOT NULL AND was_processed = 'false'"
+        ),
+        CLAIM_SQL.format(stage="has_data = TRUE AND was_processed = 'false'"),
+    ),
+    (
+        "upcoming matches",
+        "SELECT id FROM tournament_matches "
+        "WHERE start_date BETWEEN NOW() AND NOW() + INTERVAL 48 HOUR",
+        None,
+    ),
+]
+
+
+for name, refresher in refresh_accounts.REFRESHERS.items():
+    pick_sql, count_sql = stale_accounts_sql(refresher.COLUMN)
+    QUERIES += [
+        (f"stale {name} accounts", pick_sql, None),
+        (f"stale {name} backlog", count_sql, None),
+    ]
+
+
+def seed(cursor, profiles: int, matches: int, accounts: int) -> None:
+    cursor.executemany(
+        "INSERT INTO profiles (name, token, pickems_score, dd_score) "
+        "VALUES (%s, %s, %s, %s)",
+        [
+            (
+                f"user{i}",
+                str(uuid.uuid4()),
+                random.randint(0, 300),
+                random.randint(0, 900),
+            )
+            for i in range(profiles)
+        ],
+    )
+    cursor.executemany(
+        "INSERT INTO pickems (id, pickem_id, user_id, value) VALUES (%s, %s, %s, %s)",
+        [
+            (f"{user}-category-{c}", f"category-{c}", user, str(random.randint(1, 40)))
+            for user in range(1, profiles + 1)
+            for c in range(10)
+        ],
+    )
+    # a processed history with a small tail waiting for each stage
+    rows = []
+    for i in range(matches):
+        roll = random.random()
+        has_data = roll > 0.01
+        processed = roll > 0.02
+        rows.append(
+            (
+                f"EUW1_{i}",
+                f"matches/EUW1_{i}.json.gz" if has_data else None,
+                "true" if processed else "false",
+            )
+        )
+    cursor.executemany(
+        "INSERT INTO match_history (match_id, match_data_key, was_processed) "
+        "VALUES (%s, %s, %s)",
+        rows,
+    )
+    # most accounts were refreshed within the last day
+    cursor.executemany(
+        "INSERT INTO riot_accounts (account_puuid, player_id, "
+        "last_match_history_fetch, last_player_stats_fetch, "
+        "last_champion_mastery_fetch) VALUES (%s, %s, "
+        "NOW() - INTERVAL %s MINUTE, NOW() - INTERVAL %s MINUTE, "
+        "NOW() - INTERVAL %s MINUTE)",
+        [
+            (str(uuid.uuid4()), i // 2 + 1)
+            + tuple(random.randint(0, 23 * 60) for _ in range(3))
+            for i in range(accounts)
+        ],
+    )
+    cursor.executemany(
+        "INSERT INTO players (team_id) VALUES (%s)",
+        [(i // 5 + 1,) for i in range(accounts // 2 + 1)],
+    )
+    cursor.executemany(
+        "INSERT INTO tournament_matches (team_1_id, team_2_id, start_date) "
+        "VALUES (%s, %s, NOW() + INTERVAL %s DAY)",
+        [
+            (team, team + 1, random.randint(-300, 300))
+            for team in (random.randint(1, accounts // 10 + 1) for _ in range(2000))
+        ],
+    )
+    cursor.execute(
+        "ANALYZE TABLE profiles, pickems, match_history, riot_accounts, "
+        "players, tournament_matches"
+    )
+
+
+def migration_statements(schema: str) -> list[str]:
+    with open(MIGRATION) as f:
+        lines = [line for line in f if not line.lstrip().startswith("--")]
+    sql = "".join(lines).replace("tournament_db.", f"{schema}.")
+    return [statement.strip() for statement in sql.split(";") if statement.strip()]
+
+
+def explain(cursor, query: str) -> dict:
+    cursor.execute(f"EXPLAIN {query}")
+    # the plan for the first real table; derived tables come in their own rows
+    rows = cursor.fetchall()
+    plan = next(
+        (row for row in rows if not (row["table"] or "<").startswith("<")), rows[0]
+    )
+    return {key: plan[key] for key in ("type", "key", "rows", "Extra")}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--schema", default="explain_scratch")
+    parser.add_argument("--profiles", type=int, default=20000)
+    parser.add_argument("--matches", type=int, default=100000)
+    parser.add_argument("--accounts", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    connection = pymysql.connect(
+        host=os.environ["DB_HOST"],
+        port=int(os.environ["DB_PORT"]),
+        user=os.environ["DB_USER"],
+        password=os.environ["DB_PASSWORD"],
+        cursorclass=pymysql.cursors.DictCursor,
+        autocommit=True,
+    )
+    full_scans = []
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS {args.schema}")
+            cursor.execute(f"CREATE DATABASE {args.schema}")
+            cursor.execute(f"USE {args.schema}")
+            for statement in SCHEMA_SQL:
+                cursor.execute(statement)
+            seed(cursor, args.profiles, args.matches, args.accounts)
+
+            before = {name: explain(cursor, query) for name, query, _ in QUERIES}
+            for statement in migration_statements(args.schema):
+                cursor.execute(statement)
+            after = {
+                name: explain(cursor, after_query or query)
+                for name, query, after_query in QUERIES
+            }
+
+            for name, _, _ in QUERIES:
+                print(name)
+                print(f"  before: {before[name]}")
+                print(f"  after:  {after[name]}")
+                if after[name]["type"] == "ALL":
+                    full_scans.append(name)
+
+            cursor.execute(f"DROP DATABASE {args.schema}")
+    finally:
+        connection.close()
+
+    if full_scans:
+        print(f"Still scanning the whole table: {', '.join(full_scans)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Simulates one day of an ingestion job (e.g. FetchMatchData) under a fixed
+schedule and under the adaptive schedule from layers/common/polling.py, and
+prints invocation counts, empty runs and how long work waited.
+
+    python scripts/simulate_polling.py [--capacity 50] [--fixed 5] [--max 15]
+"""
+
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(
+    0,
+    os.path.join(os.path.dirname(__file__), "..", "cloudformation", "layers", "common"),
+)
+from polling import next_interval  # noqa: E402
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def idle_day(minute: int) -> int:
+    return 0
+
+
+def trickle_day(minute: int) -> int:
+    # a handful of solo-queue games over the day
+    return 1 if random.random() < 0.01 else 0
+
+
+def bursty_day(minute: int) -> int:
+    # tournament evening: a wave of finished games every 45 minutes between
+    # 18:00 and 23:00, a trickle the rest of the day
+    hour = minute // 60
+    if 18 <= hour < 23 and minute % 45 == 0:
+        return random.randint(40, 120)
+    return trickle_day(minute)
+
+
+def simulate(arrivals, schedule, capacity: int) -> dict:
+    backlog = []  # arrival minute of every waiting item
+    invocations = empty = 0
+    waits = []
+    peak = 0
+    next_run = 0
+    interval = None
+
+    for minute in range(MINUTES_PER_DAY):
+        backlog += [minute] * arrivals(minute)
+        peak = max(peak, len(backlog))
+        if minute < next_run:
+            continue
+
+        invocations += 1
+        if not backlog:
+            empty += 1
+        done, backlog = backlog[:capacity], backlog[capacity:]
+        waits += [minute - arrived for arrived in done]
+
+        interval = schedule(len(backlog), interval)
+        next_run = minute + interval
+
+    return {
+        "invocations": invocations,
+        "empty": empty,
+        "avg_wait": sum(waits) / len(waits) if waits else 0.0,
+        "max_wait": max(waits, default=0),
+        "peak_backlog": peak,
+        "left_over": len(backlog),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--capacity", type=int, default=50, help="items per run")
+    parser.add_argument("--fixed", type=int, default=5, help="fixed rate, minutes")
+    parser.add_argument("--min", type=int, default=2, dest="min_minutes")
+    parser.add_argument("--max", type=int, default=15, dest="max_minutes")
+    parser.add_argument("--busy", type=int, default=50, help="busy backlog")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    def fixed(backlog, current):
+        return args.fixed
+
+    def adaptive(backlog, current):
+        return next_interval(
+            backlog,
+            current or args.fixed,
+            min_minutes=args.min_minutes,
+            max_minutes=args.max_minutes,
+            busy_backlog=args.busy,
+        )
+
+    print(
+        f"{'load':8s} {'schedule':9s} {'runs':>5s} {'empty':>6s} "
+        f"{'avg wait':>9s} {'max wait':>9s} {'peak':>5s}"
+    )
+    for name, arrivals in (
+        ("idle", idle_day),
+        ("trickle", trickle_day),
+        ("bursty", bursty_day),
+    ):
+        for label, schedule in (("fixed", fixed), ("adaptive", adaptive)):
+            random.seed(args.seed)
+            result = simulate(arrivals, schedule, args.capacity)
+            print(
+                f"{name:8s} {label:9s} {result['invocations']:5d} "
+                f"{result['empty']:6d} {result['avg_wait']:8.1f}m "
+                f"{result['max_wait']:8d}m {result['peak_backlog']:5d}"
+            )
+
+
+if __name__ == "__main__":
+    main()